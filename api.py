@@ -0,0 +1,275 @@
+from datetime import datetime
+
+from flask import (
+    Blueprint,
+    Response,
+    abort,
+    current_app,
+    jsonify,
+    request,
+    stream_with_context,
+)
+
+from availability import end_of, free_venues
+from export import FORMATS, KINDS as EXPORTS, export
+from models import Artist, Venue, artist_genre, venue_genre
+from queries import (
+    decode_cursor,
+    entity_page,
+    entity_row,
+    genre_names,
+    show_filters,
+    shows_page,
+)
+from search import get_search_backend
+
+# ----------------------------------------------------------------------------#
+# JSON API v1.
+# ----------------------------------------------------------------------------#
+# Read-only mirror of the HTML controllers. Every endpoint selects columns
+# directly (no ORM instances) and accepts ?fields=a,b,c; list endpoints are
+# cursor paginated with ?after=<cursor>&limit=<n>.
+
+api = Blueprint("api", __name__, url_prefix="/api/v1")
+
+# fields computed from other tables, fetched in one batch per page
+COMPUTED_FIELDS = ("genres",)
+
+# public field name -> model column, when they differ
+COLUMNS = {"num_upcoming_shows": "upcoming_shows_count"}
+
+VENUE_FIELDS = (
+    "id",
+    "name",
+    "city",
+    "state",
+    "address",
+    "phone",
+    "website",
+    "facebook_link",
+    "seeking_talent",
+    "seeking_description",
+    "image_link",
+    "num_upcoming_shows",
+    "next_show_time",
+) + COMPUTED_FIELDS
+
+ARTIST_FIELDS = (
+    "id",
+    "name",
+    "city",
+    "state",
+    "phone",
+    "website",
+    "facebook_link",
+    "seeking_venue",
+    "seeking_description",
+    "image_link",
+    "num_upcoming_shows",
+    "next_show_time",
+) + COMPUTED_FIELDS
+
+SHOW_FIELDS = (
+    "id",
+    "start_time",
+    "venue_id",
+    "venue_name",
+    "artist_id",
+    "artist_name",
+    "artist_image_link",
+)
+
+LIST_DEFAULT_FIELDS = ("id", "name", "city", "state")
+
+# model, allowed fields, genre association key
+ENTITIES = {
+    "venue": (Venue, VENUE_FIELDS, venue_genre.c.venue_id),
+    "artist": (Artist, ARTIST_FIELDS, artist_genre.c.artist_id),
+}
+
+
+def requested_fields(allowed, default):
+    raw = request.args.get("fields")
+    if not raw:
+        return list(default)
+    fields = [field.strip() for field in raw.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        abort(400, description=f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def page_limit():
+    limit = request.args.get("limit", current_app.config["SHOWS_PAGE_SIZE"], type=int)
+    return max(1, min(limit, current_app.config["SHOWS_MAX_PAGE_SIZE"]))
+
+
+def column_fields(fields):
+    return [field for field in fields if field not in COMPUTED_FIELDS]
+
+
+def serialize(rows, kind, fields):
+    """Dicts with only ``fields`` from ``(id, *columns)`` rows."""
+    model, allowed, genre_key = ENTITIES[kind]
+    names = column_fields(fields)
+    ids = [row[0] for row in rows]
+    genres = genre_names(genre_key, ids) if "genres" in fields else None
+    data = []
+    for row in rows:
+        item = dict(zip(names, row[1:]))
+        if item.get("next_show_time") is not None:
+            item["next_show_time"] = item["next_show_time"].isoformat()
+        if genres is not None:
+            item["genres"] = genres[row[0]]
+        data.append(item)
+    return data
+
+
+def columns_of(fields):
+    return [COLUMNS.get(field, field) for field in column_fields(fields)]
+
+
+def entity_list(kind):
+    model, allowed, genre_key = ENTITIES[kind]
+    fields = requested_fields(allowed, LIST_DEFAULT_FIELDS)
+    columns = columns_of(fields)
+    after = request.args.get("after")
+    if after is not None and not after.isdigit():
+        abort(400, description="Invalid cursor")
+    rows, next_cursor = entity_page(
+        model, columns, after=int(after) if after else None, limit=page_limit()
+    )
+    return jsonify(
+        {
+            "data": serialize(rows, kind, fields),
+            "next": str(next_cursor) if next_cursor else None,
+        }
+    )
+
+
+def entity_detail(kind, entity_id):
+    model, allowed, genre_key = ENTITIES[kind]
+    fields = requested_fields(allowed, allowed)
+    columns = columns_of(fields)
+    row = entity_row(model, columns, entity_id)
+    if row is None:
+        abort(404, description=f"{kind} {entity_id} not found")
+    return jsonify(serialize([row], kind, fields)[0])
+
+
+@api.route("/venues")
+def venues():
+    return entity_list("venue")
+
+
+@api.route("/venues/<int:venue_id>")
+def venue(venue_id):
+    return entity_detail("venue", venue_id)
+
+
+@api.route("/venues/available")
+def available_venues():
+    """Venues of ?city=&state= free during [start, end) (ISO datetimes)."""
+    city, state = request.args.get("city"), request.args.get("state")
+    start = query_arg("start", datetime.fromisoformat)
+    if not city or not state or start is None:
+        abort(400, description="city, state and start are required")
+    end = end_of(start, query_arg("end", datetime.fromisoformat))
+    if end <= start:
+        abort(400, description="end must be after start")
+    venues = free_venues(city, state, start, end)
+    return jsonify(
+        {
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "data": [venue._asdict() for venue in venues],
+        }
+    )
+
+
+@api.route("/artists")
+def artists():
+    return entity_list("artist")
+
+
+@api.route("/artists/<int:artist_id>")
+def artist(artist_id):
+    return entity_detail("artist", artist_id)
+
+
+@api.route("/shows")
+def shows():
+    fields = requested_fields(SHOW_FIELDS, SHOW_FIELDS)
+    after = request.args.get("after")
+    try:
+        after = decode_cursor(after) if after else None
+    except ValueError:
+        abort(400, description="Invalid cursor")
+    try:
+        filters = show_filters(request.args)
+    except ValueError as error:
+        abort(400, description=str(error))
+    rows, next_cursor = shows_page(after=after, limit=page_limit(), **filters)
+    data = []
+    for row in rows:
+        item = {field: getattr(row, field) for field in fields}
+        if "start_time" in item:
+            item["start_time"] = item["start_time"].isoformat()
+        data.append(item)
+    return jsonify({"data": data, "next": next_cursor})
+
+
+@api.route("/search")
+def search():
+    search_term = request.args.get("q", "").strip()
+    if not search_term:
+        abort(400, description="Missing q parameter")
+    results = get_search_backend().search_all(
+        search_term, limit=current_app.config["SEARCH_MAX_RESULTS"]
+    )
+    return jsonify({"search_term": search_term, **results})
+
+
+def query_arg(name, convert):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return convert(value)
+    except ValueError:
+        abort(400, description=f"Invalid {name}")
+
+
+@api.route("/export/<kind>")
+def export_rows(kind):
+    """
+    Streams every matching row as CSV or JSON lines (?format=csv|jsonl),
+    filtered by ?since=&until= (ISO dates), venue_id, artist_id and genre.
+    """
+    if kind not in EXPORTS:
+        abort(404, description=f"Unknown export: {kind}")
+    fmt = request.args.get("format", "jsonl")
+    if fmt not in FORMATS:
+        abort(400, description=f"Unknown format: {fmt}")
+    try:
+        chunks = export(
+            kind,
+            fmt,
+            since=query_arg("since", datetime.fromisoformat),
+            until=query_arg("until", datetime.fromisoformat),
+            venue_id=query_arg("venue_id", int),
+            artist_id=query_arg("artist_id", int),
+            genre=request.args.get("genre") or None,
+        )
+    except ValueError as error:
+        abort(400, description=str(error))
+    # the generator runs after the view returns, keep the session around
+    response = Response(stream_with_context(chunks), mimetype=FORMATS[fmt])
+    response.headers["Content-Disposition"] = f"attachment; filename={kind}.{fmt}"
+    return response
+
+
+@api.errorhandler(400)
+@api.errorhandler(404)
+def json_error(error):
+    return jsonify({"error": error.description}), error.code
@@ -4,10 +4,10 @@
 
 import json
 import os
-import dateutil.parser
-import babel
 from flask import (
     Flask,
+    abort,
+    current_app,
     jsonify,
     render_template,
     request,
@@ -22,24 +22,64 @@ import logging
 from logging import Formatter, FileHandler
 from flask_wtf import Form
 from jinja2 import filters
-from sqlalchemy import or_
-import config
 from forms import *
 from flask_migrate import Migrate
-from models import Artist, Genre, Show, Venue, db
-from seeds import seed_data
+import config
+from api import api
+from availability import conflict_errors, end_of
+from cache import response_cache
+from conditional import conditional
+from counters import roll_forward_command
+from export import export_command
+from facets import facet_counts
+from fanout import fanout
+from genres import genre_cache
+from importer import import_command
+from instrumentation import instrumentation
+from metrics import metrics
+from loading import query_for
+from models import Artist, Genre, Show, Venue, artist_genre, db
+from queries import (
+    artist_ids_at_venue,
+    artist_shows,
+    artist_version,
+    artists_version,
+    decode_cursor,
+    has_genre,
+    show_counts,
+    show_filters,
+    shows_page,
+    shows_version,
+    venue_areas,
+    venue_ids_of_artist,
+    venue_shows,
+    venue_version,
+    venues_version,
+    window,
+)
+from search import get_search_backend, search_index_command
+from seeds import seed_command
+
 # ----------------------------------------------------------------------------#
 # App Config.
 # ----------------------------------------------------------------------------#
 
-app = Flask(__name__)
-app.config["SECRET_KEY"] = config.SECRET_KEY
-app.config["SQLALCHEMY_DATABASE_URI"] = config.SQLALCHEMY_DATABASE_URI
-moment = Moment(app)
-app.config.from_object("config")
-# DONE: connect to a local postgresql database
-db.init_app(app)
-migrate = Migrate(app, db)
+# Extensions are bound to an application in create_app(); importing this
+# module builds no app and touches no database.
+moment = Moment()
+migrate = Migrate()
+
+# (rule, view, options) collected by @route and registered by create_app(),
+# endpoints keep the view function names
+routes = []
+
+
+def route(rule, **options):
+    def decorator(view):
+        routes.append((rule, view, options))
+        return view
+
+    return decorator
 
 
 # ----------------------------------------------------------------------------#
@@ -48,91 +88,138 @@ migrate = Migrate(app, db)
 
 
 def format_datetime(value, format="medium"):
+    # babel and dateutil are imported on first use rather than at startup
+    from babel.dates import format_datetime as babel_format_datetime
+
     if isinstance(value, datetime):
         date = value
     else:
+        import dateutil.parser
+
         date = dateutil.parser.parse(value)
     if format == "full":
         format = "EEEE MMMM, d, y 'at' h:mma"
     elif format == "medium":
         format = "EE MM, dd, y h:mma"
-    return babel.dates.format_datetime(date, format, locale="en")
+    return babel_format_datetime(date, format, locale="en")
 
 
 def get_genres(genres: list[Genre]):
     return [genre.name for genre in genres if genre is not None]
 
 
-def get_filtered_genres(words):
-    filters = [Genre.name.ilike(f"%{word}%") for word in words]
-    return Genre.query.filter(or_(*filters)).all()
+def cursor_arg(name):
+    """Keyset cursor from the query string, 400 when it is malformed."""
+    cursor = request.args.get(name)
+    try:
+        return decode_cursor(cursor) if cursor else None
+    except ValueError:
+        abort(400)
+
+
+def genre_arg():
+    """(name, id) of the ?genre= facet, (None, None) without one, 400 if unknown."""
+    name = request.args.get("genre")
+    if not name:
+        return None, None
+    genre_id = genre_cache.by_name.get(name)
+    if genre_id is None:
+        abort(400)
+    return name, genre_id
+
+
+def venues_listing_version():
+    # re-tagging a venue's genres does not always touch the Venue row
+    return {**venues_version()._asdict(), "facets": facet_counts.counts("venues")}
+
 
+def artists_listing_version():
+    return {**artists_version()._asdict(), "facets": facet_counts.counts("artists")}
+
+
+def show_filter_args():
+    """shows_page filters of the query string, 400 when one is malformed."""
+    try:
+        return show_filters(request.args)
+    except ValueError:
+        abort(400)
+
+
+def shows_listing_version():
+    # ?when= windows also end at a day/week/month boundary that moves
+    until = show_filter_args().get("until")
+    return {**shows_version()._asdict(), "until": until}
+
+
+def load_genre_cache():
+    # warm the genre catalog once, it is reloaded only when a Genre changes
+    genre_cache.load()
 
-app.jinja_env.filters["datetime"] = format_datetime
 
 # ----------------------------------------------------------------------------#
 # Controllers.
 # ----------------------------------------------------------------------------#
 
 
-@app.route("/")
+@route("/")
 def index():
     return render_template("pages/home.html")
 
 
+@route("/search")
+def search():
+    # one ranked query over names, cities, states and genres of venues and artists
+    search_term = request.args.get("search_term", "").strip()
+    results = {"count": 0, "counts": {"venue": 0, "artist": 0}, "data": []}
+    if search_term:
+        results = get_search_backend().search_all(
+            search_term, limit=current_app.config["SEARCH_MAX_RESULTS"]
+        )
+    if request.args.get("format") == "json":
+        return jsonify({"search_term": search_term, **results})
+    return render_template(
+        "pages/search.html", results=results, search_term=search_term
+    )
+
+
 #  Venues
 #  ----------------------------------------------------------------
 
 
-@app.route("/venues")
+@route("/venues")
+@conditional(venues_listing_version)
 def venues():
-    all_venues: list[Venue] = Venue.query.all()
-    if not all_venues:
-        return render_template("pages/venues.html", areas=[])
-    datadictionary = {}
-    for venue in all_venues:
-        keyvenue = f"{venue.city}-{venue.state}"
-        locationvenue = {"city": venue.city, "state": venue.state, "venues": []}
-        if keyvenue not in datadictionary:
-            datadictionary[keyvenue] = locationvenue
-        total_shows = (
-            db.session.query(Show)
-            .join(Venue)
-            .filter((venue.id == Show.venue_id) & (Show.start_time > datetime.now()))
-            .all()
-        )
-        count_upcoming = len(total_shows)
-        datadictionary[keyvenue]["venues"].append(
-            {"id": venue.id, "name": venue.name, "num_upcoming_shows": count_upcoming}
-        )
-    data = []
-    for value in datadictionary.values():
-        data.append(value)
-    return render_template("pages/venues.html", areas=data)
+    # one grouped query, see queries.venue_areas; ?genre= narrows it
+    genre, genre_id = genre_arg()
+    data = venue_areas(genre_id)
+    return render_template(
+        "pages/venues.html",
+        areas=data,
+        facets=facet_counts.counts("venues"),
+        genre=genre,
+    )
 
 
-@app.route("/venues/search", methods=["POST"])
+@route("/venues/search", methods=["POST"])
 def search_venues():
     # DONE implement search on artists with partial string search. Ensure it is case-insensitive.
     # seach for Hop should return "The Musical Hop".
     # search for "Music" should return "The Musical Hop" and "Park Square Live Music & Coffee"
     search_term = request.form.get("search_term", "")
-    venues: list[Venue] = Venue.query.filter(Venue.name.ilike(f"%{search_term}%")).all()
+    venues = get_search_backend().search(
+        Venue, search_term, limit=current_app.config["SEARCH_MAX_RESULTS"]
+    )
     response = {
-        "count": len(venues),
-        "data": [],
+        "count": venues[0].total if venues else 0,
+        "data": [
+            {
+                "id": venue.id,
+                "name": venue.name,
+                "num_upcoming_shows": venue.upcoming_shows_count,
+            }
+            for venue in venues
+        ],
     }
-    for venue in venues:
-        total_shows = (
-            db.session.query(Show)
-            .join(Venue)
-            .filter((venue.id == Show.venue_id) & (Show.start_time > datetime.now()))
-            .all()
-        )
-        total_shows = len(total_shows)
-        response["data"].append(
-            {"id": venue.id, "name": venue.name, "num_upcoming_shows": total_shows}
-        )
 
     return render_template(
         "pages/search_venues.html",
@@ -141,35 +228,35 @@ def search_venues():
     )
 
 
-@app.route("/venues/<int:venue_id>")
+@route("/venues/<int:venue_id>")
+@conditional(venue_version)
+@response_cache.cached("venue")
 def show_venue(venue_id):
     # shows the venue page with the given venue_id
     # DONE: replace with real venue data from the venues table, using venue_id
-    venue: Venue = Venue.query.get_or_404(venue_id)
-    past_shows = []
-    upcomming_shows = []
-    results = (
-        db.session.query(Show, Artist)
-        .join(Artist, Show.artist_id == Artist.id)
-        .filter(Show.venue_id == venue_id)
-        .all()
+    upcoming_after = cursor_arg("upcoming_after")
+    past_before = cursor_arg("past_before")
+    now = datetime.now()
+    limit = current_app.config["DETAIL_SHOWS_PAGE_SIZE"]
+    # counts come from one aggregate, shows from bounded windows ("load more");
+    # the four queries are independent, see fanout.py
+    venue, counts, upcoming, past = fanout.run(
+        lambda: query_for(Venue, "detail").get_or_404(venue_id),
+        lambda: show_counts(Show.venue_id, venue_id, now),
+        lambda: window(venue_shows(venue_id, True, now, upcoming_after), limit),
+        lambda: window(venue_shows(venue_id, False, now, past_before), limit),
     )
-    for show, artist in results:
-        temp_show = {
-            "artist_id": show.artist_id,
-            "start_time": show.start_time,
-            "artist_image_link": artist.image_link,
-        }
-        if show.start_time > datetime.now():
-            upcomming_shows.append(temp_show)
-        else:
-            past_shows.append(temp_show)
+    upcoming_count, past_count = counts
+    upcomming_shows, next_upcoming = upcoming
+    past_shows, next_past = past
     data = {
         **venue.to_dict(),
         "past_shows": past_shows,
         "upcoming_shows": upcomming_shows,
-        "past_shows_count": len(past_shows),
-        "upcoming_shows_count": len(upcomming_shows),
+        "past_shows_count": past_count,
+        "upcoming_shows_count": upcoming_count,
+        "next_upcoming": next_upcoming,
+        "next_past": next_past,
         "genres": get_genres(venue.genres),
     }
     return render_template("pages/show_venue.html", venue=data)
@@ -179,13 +266,13 @@ def show_venue(venue_id):
 #  ----------------------------------------------------------------
 
 
-@app.route("/venues/create", methods=["GET"])
+@route("/venues/create", methods=["GET"])
 def create_venue_form():
     form = VenueForm()
     return render_template("forms/new_venue.html", form=form)
 
 
-@app.route("/venues/create", methods=["POST"])
+@route("/venues/create", methods=["POST"])
 def create_venue_submission():
     # DONE: insert form data as a new Venue record in the db, instead
     # DONE: modify data to be the data object returned from db insertion
@@ -194,8 +281,7 @@ def create_venue_submission():
         data = form.data
         data["website"] = data.pop("website_link")
         data.pop("csrf_token")
-        genres = db.session.query(Genre).filter(Genre.name.in_(data["genres"])).all()
-        data["genres"] = genres
+        data["genres"] = genre_cache.resolve(data["genres"])
         temp_venue = Venue(**data)
         db.session.add(temp_venue)
         try:
@@ -215,14 +301,17 @@ def create_venue_submission():
     return render_template("pages/home.html")
 
 
-@app.route("/venues/<int:venue_id>", methods=["DELETE"])
+@route("/venues/<int:venue_id>", methods=["DELETE"])
 def delete_venue(venue_id):
     # DONE: Complete this endpoint for taking a venue_id, and using
     # SQLAlchemy ORM to delete a record. Handle cases where the session commit could fail.
     try:
-        venue = Venue.query.get(venue_id)
+        venue = query_for(Venue, "delete").get(venue_id)
+        artist_ids = artist_ids_at_venue(venue_id)
         db.session.delete(venue)
         db.session.commit()
+        response_cache.invalidate("venue", venue_id)
+        response_cache.invalidate("artist", *artist_ids)
         flash("Venue fue eliminado exitosamente.")
         return jsonify({"success": True}), 200
     except Exception:
@@ -235,13 +324,22 @@ def delete_venue(venue_id):
 
 #  Artists
 #  ----------------------------------------------------------------
-@app.route("/artists")
+@route("/artists")
+@conditional(artists_listing_version)
 def artists():
-    data = Artist.query.with_entities(Artist.id, Artist.name).all()
-    return render_template("pages/artists.html", artists=data)
+    genre, genre_id = genre_arg()
+    query = Artist.query.with_entities(Artist.id, Artist.name)
+    if genre_id is not None:
+        query = query.filter(has_genre(artist_genre.c.artist_id, Artist.id, genre_id))
+    return render_template(
+        "pages/artists.html",
+        artists=query.all(),
+        facets=facet_counts.counts("artists"),
+        genre=genre,
+    )
 
 
-@app.route("/artists/search", methods=["POST"])
+@route("/artists/search", methods=["POST"])
 def search_artists():
     # DONE: implement search on artists with partial string search. Ensure it is case-insensitive.
     # seach for "A" should return "Guns N Petals", "Matt Quevado", and "The Wild Sax Band".
@@ -251,16 +349,18 @@ def search_artists():
         "data": [],
     }
     search_term = request.form.get("search_term", "")
-    artists: list[Artist] = (
-        Artist.query.with_entities(Artist.id, Artist.name)
-        .filter(Artist.name.ilike(f"%{search_term}%"))
-        .all()
+    artists = get_search_backend().search(
+        Artist, search_term, limit=current_app.config["SEARCH_MAX_RESULTS"]
     )
     for artist in artists:
         response["data"].append(
-            {"id": artist.id, "name": artist.name, "num_upcoming_shows": 0}
+            {
+                "id": artist.id,
+                "name": artist.name,
+                "num_upcoming_shows": artist.upcoming_shows_count,
+            }
         )
-    response["count"] = len(artists)
+    response["count"] = artists[0].total if artists else 0
     return render_template(
         "pages/search_artists.html",
         results=response,
@@ -268,41 +368,35 @@ def search_artists():
     )
 
 
-@app.route("/artists/<int:artist_id>", methods=["GET"])
+@route("/artists/<int:artist_id>", methods=["GET"])
+@conditional(artist_version)
+@response_cache.cached("artist")
 def show_artist(artist_id):
     # shows the artist page with the given artist_id
     # DONE: replace with real artist data from the artist table, using artist_id
 
+    upcoming_after = cursor_arg("upcoming_after")
+    past_before = cursor_arg("past_before")
     try:
-        artist: Artist = Artist.query.get_or_404(artist_id)
-        shows = (
-            db.session.query(Show).join(Venue).filter(Show.artist_id == artist_id).all()
-        )
-        upcoming_shows = []
-        past_shows = []
-        results = (
-            db.session.query(Show, Venue)
-            .join(Venue, Show.venue_id == Venue.id)
-            .filter(Show.artist_id == artist_id)
-            .all()
+        now = datetime.now()
+        limit = current_app.config["DETAIL_SHOWS_PAGE_SIZE"]
+        artist, counts, upcoming, past = fanout.run(
+            lambda: query_for(Artist, "detail").get_or_404(artist_id),
+            lambda: show_counts(Show.artist_id, artist_id, now),
+            lambda: window(artist_shows(artist_id, True, now, upcoming_after), limit),
+            lambda: window(artist_shows(artist_id, False, now, past_before), limit),
         )
-        for show, venue in results:
-            temp_show = {
-                "venue_id": venue.id,
-                "venue_name": venue.name,
-                "venue_image_link": venue.image_link,
-                "start_time": show.start_time,
-            }
-            if show.start_time > datetime.now():
-                upcoming_shows.append(temp_show)
-            else:
-                past_shows.append(temp_show)
+        upcoming_count, past_count = counts
+        upcoming_shows, next_upcoming = upcoming
+        past_shows, next_past = past
         data = {
             **artist.to_dict(),
             "past_shows": past_shows,
-            "past_shows_count": len(past_shows),
+            "past_shows_count": past_count,
             "upcoming_shows": upcoming_shows,
-            "upcoming_shows_count": len(upcoming_shows),
+            "upcoming_shows_count": upcoming_count,
+            "next_upcoming": next_upcoming,
+            "next_past": next_past,
             "genres": [g.name for g in artist.genres],
         }
     except Exception:
@@ -314,29 +408,34 @@ def show_artist(artist_id):
 
 #  Update
 #  ----------------------------------------------------------------
-@app.route("/artists/<int:artist_id>/edit", methods=["GET"])
+@route("/artists/<int:artist_id>/edit", methods=["GET"])
 def edit_artist(artist_id):
     # DONE: populate form with fields from artist with ID <artist_id>
-    artist: Artist = Artist.query.get_or_404(artist_id)
+    artist: Artist = query_for(Artist, "edit").get_or_404(artist_id)
     form = ArtistForm(obj=artist)
     form.genres.data = get_genres(artist.genres)
     return render_template("forms/edit_artist.html", form=form, artist=artist)
 
 
-@app.route("/artists/<int:artist_id>/edit", methods=["POST"])
+@route("/artists/<int:artist_id>/edit", methods=["POST"])
 def edit_artist_submission(artist_id):
     # DONE: take values from the form submitted, and update existing
     # artist record with ID <artist_id> using the new attributes
-    artist = Artist.query.get(artist_id)
+    artist = query_for(Artist, "edit").get(artist_id)
     form = ArtistForm(obj=artist)
     try:
         if form.validate_on_submit():
             genres = form.genres.data
             del form.genres
             form.populate_obj(artist)
-            artist.genres = get_filtered_genres(genres)
+            artist.genres = genre_cache.resolve(genres)
+            # genre changes alone do not update the row
+            artist.updated_at = datetime.utcnow()
             db.session.add(artist)
             db.session.commit()
+            # venue pages show the artist image
+            response_cache.invalidate("artist", artist_id)
+            response_cache.invalidate("venue", *venue_ids_of_artist(artist_id))
             flash("Updated artist")
         else:
             flash("Incorrect updated artist", "error")
@@ -346,11 +445,11 @@ def edit_artist_submission(artist_id):
     return redirect(url_for("show_artist", artist_id=artist_id))
 
 
-@app.route("/venues/<int:venue_id>/edit", methods=["GET"])
+@route("/venues/<int:venue_id>/edit", methods=["GET"])
 def edit_venue(venue_id):
     # DONE: populate form with values from venue with ID <venue_id>
     try:
-        venue: Venue = Venue.query.get_or_404(venue_id)
+        venue: Venue = query_for(Venue, "edit").get_or_404(venue_id)
         form = VenueForm(obj=venue)
         form.genres.data = get_genres(venue.genres)
     except Exception as e:
@@ -359,20 +458,24 @@ def edit_venue(venue_id):
     return render_template("forms/edit_venue.html", form=form, venue=venue)
 
 
-@app.route("/venues/<int:venue_id>/edit", methods=["POST"])
+@route("/venues/<int:venue_id>/edit", methods=["POST"])
 def edit_venue_submission(venue_id):
     # DONE  take values from the form submitted, and update existing
     # venue record with ID <venue_id> using the new attributes
     try:
-        venue = Venue.query.get_or_404(venue_id)
+        venue = query_for(Venue, "edit").get_or_404(venue_id)
         form = VenueForm(obj=venue)
         if form.validate_on_submit():
             genres = form.genres.data
             del form.genres
             form.populate_obj(obj=venue)
-            venue.genres = get_filtered_genres(genres)
+            venue.genres = genre_cache.resolve(genres)
+            venue.updated_at = datetime.utcnow()
             db.session.add(venue)
             db.session.commit()
+            # artist pages show the venue name and image
+            response_cache.invalidate("venue", venue_id)
+            response_cache.invalidate("artist", *artist_ids_at_venue(venue_id))
         else:
             flash("Invalid data")
     except Exception as e:
@@ -384,13 +487,13 @@ def edit_venue_submission(venue_id):
 #  ----------------------------------------------------------------
 
 
-@app.route("/artists/create", methods=["GET"])
+@route("/artists/create", methods=["GET"])
 def create_artist_form():
     form = ArtistForm()
     return render_template("forms/new_artist.html", form=form)
 
 
-@app.route("/artists/create", methods=["POST"])
+@route("/artists/create", methods=["POST"])
 def create_artist_submission():
     # called upon submitting the new artist listing form
     # DONE: insert form data as a new Venue record in the db, instead
@@ -400,8 +503,7 @@ def create_artist_submission():
         data = form.data
         data.pop("csrf_token")
         data["website"] = data.pop("website_link")
-        genres = db.session.query(Genre).filter(Genre.name.in_(data["genres"])).all()
-        data["genres"] = genres
+        data["genres"] = genre_cache.resolve(data["genres"])
         artist = Artist(**data)
         db.session.add(artist)
         try:
@@ -422,36 +524,41 @@ def create_artist_submission():
 #  ----------------------------------------------------------------
 
 
-@app.route("/shows")
+@route("/shows")
+@conditional(shows_listing_version)
 def shows():
     # displays list of shows at /shows
     # DONE: replace with real venues data.
-    shows: list[Show] = Show.query.all()
-    data = []
-    for show in shows:
-        venue: Venue = Venue.query.get(show.venue_id)
-        artist: Artist = Artist.query.get(show.artist_id)
-        data.append(
-            {
-                "venue_id": show.venue_id,
-                "venue_name": venue.name,
-                "artist_id": show.artist_id,
-                "artist_name": artist.name,
-                "artist_image_link": artist.image_link,
-                "start_time": show.start_time,
-            }
-        )
-    return render_template("pages/shows.html", shows=data)
+    # keyset pagination: ?after=<cursor>&limit=<n>, one joined query per page,
+    # narrowed by ?when= or ?from=&to=, ?city=, ?state= and ?genre=
+    limit = min(
+        request.args.get("limit", current_app.config["SHOWS_PAGE_SIZE"], type=int),
+        current_app.config["SHOWS_MAX_PAGE_SIZE"],
+    )
+    after = cursor_arg("after")
+    data, next_cursor = shows_page(
+        after=after, limit=max(limit, 1), **show_filter_args()
+    )
+    # the "next" link keeps the filters
+    params = {name: value for name, value in request.args.items() if name != "after"}
+    params["limit"] = limit
+    return render_template(
+        "pages/shows.html",
+        shows=data,
+        next_cursor=next_cursor,
+        params=params,
+        genres=list(genre_cache.by_name),
+    )
 
 
-@app.route("/shows/create")
+@route("/shows/create")
 def create_shows():
     # renders form. do not touch.
     form = ShowForm()
     return render_template("forms/new_show.html", form=form)
 
 
-@app.route("/shows/create", methods=["POST"])
+@route("/shows/create", methods=["POST"])
 def create_show_submission():
     # called to create new shows in the db, upon submitting new show listing form
     # DONE: insert form data as a new Show record in the db, instead
@@ -459,10 +566,31 @@ def create_show_submission():
         form = ShowForm()
         if form.validate_on_submit():
             data = form.data
-            del data["csrf_token"]
+            data.pop("csrf_token", None)
+            data["venue_id"] = int(data["venue_id"])
+            data["artist_id"] = int(data["artist_id"])
+            data["end_time"] = end_of(data["start_time"], data["end_time"])
             show = Show(**data)
             db.session.add(show)
+            # checked after the INSERT, inside its transaction: SQLite holds
+            # the write lock until the commit, and PostgreSQL's exclusion
+            # constraints catch bookings of concurrent transactions
+            db.session.flush()
+            errors = conflict_errors(
+                show.venue_id,
+                show.artist_id,
+                show.start_time,
+                show.end_time,
+                exclude=show.id,
+            )
+            if errors:
+                db.session.rollback()
+                for message in errors["start_time"]:
+                    flash(message, "error")
+                return render_template("forms/new_show.html", form=form)
             db.session.commit()
+            response_cache.invalidate("venue", show.venue_id)
+            response_cache.invalidate("artist", show.artist_id)
             flash("Show was successfully listed!")
         else:
             flash(f"Error in data", "error")
@@ -476,17 +604,17 @@ def create_show_submission():
     return render_template("pages/home.html")
 
 
-@app.errorhandler(404)
 def not_found_error(error):
     return render_template("errors/404.html"), 404
 
 
-@app.errorhandler(500)
 def server_error(error):
     return render_template("errors/500.html"), 500
 
 
-if not app.debug:
+def configure_logging(app):
+    if app.debug or app.testing:
+        return
     file_handler = FileHandler("error.log")
     file_handler.setFormatter(
         Formatter("%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]")
@@ -496,23 +624,62 @@ if not app.debug:
     app.logger.addHandler(file_handler)
     app.logger.info("errors")
 
+
 # ----------------------------------------------------------------------------#
-# Launch.
+# App factory.
 # ----------------------------------------------------------------------------#
 
-# Default port:
-# if __name__ == "__main__":
-#     with app.app_context():
-#         db.drop_all()
-#         db.create_all()
-#         seed_data(db, Venue, Artist, Show)
-#     app.run()
 
-# Or specify port manually:
+def create_app(config_object="config"):
+    """
+    Build the application. ``config_object`` is an import path or object for
+    ``config.from_object``, or a mapping of overrides applied on top of
+    ``config``; engine options then follow an overridden database URI unless
+    given too. Tables are created and seeded only by ``flask db upgrade``
+    and ``flask seed``.
+    """
+    app = Flask(__name__)
+    if isinstance(config_object, dict):
+        app.config.from_object("config")
+        app.config.update(config_object)
+        if "SQLALCHEMY_ENGINE_OPTIONS" not in config_object:
+            # pool options were computed for the environment's database
+            app.config["SQLALCHEMY_ENGINE_OPTIONS"] = config.engine_options(
+                app.config["SQLALCHEMY_DATABASE_URI"]
+            )
+    else:
+        app.config.from_object(config_object)
+    # DONE: connect to a local postgresql database
+    db.init_app(app)
+    moment.init_app(app)
+    migrate.init_app(app, db)
+    response_cache.init_app(app)
+    instrumentation.init_app(app)
+    metrics.init_app(app)
+    fanout.init_app(app)
+    app.register_blueprint(api)
+    for rule, view, options in routes:
+        app.add_url_rule(rule, view_func=view, **options)
+    app.register_error_handler(404, not_found_error)
+    app.register_error_handler(500, server_error)
+    app.jinja_env.filters["datetime"] = format_datetime
+    app.before_first_request(load_genre_cache)
+    app.cli.add_command(roll_forward_command)
+    app.cli.add_command(import_command)
+    app.cli.add_command(export_command)
+    app.cli.add_command(seed_command)
+    app.cli.add_command(search_index_command)
+    configure_logging(app)
+    return app
+
+
+# ----------------------------------------------------------------------------#
+# Launch.
+# ----------------------------------------------------------------------------#
+
+# Create and seed the database once with
+#     flask db upgrade && flask seed
+# then start the development server:
 if __name__ == "__main__":
-    with app.app_context():
-        db.drop_all()
-        db.create_all()
-        seed_data(db, Venue, Artist, Show)
     port = int(os.environ.get("PORT", 5000))
-    app.run(host="0.0.0.0", port=port)
+    create_app().run(host="0.0.0.0", port=port)
@@ -0,0 +1,153 @@
+import json
+import zlib
+
+from sqlalchemy import and_, event, inspect, or_, text
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.orm import Session
+
+from models import Area, Venue
+
+
+# ----------------------------------------------------------------------------#
+# Materialized city/state areas.
+# ----------------------------------------------------------------------------#
+# The venues page lists venues grouped by (city, state). The Area table holds
+# that grouping ready to render, one row per area with its venues serialized,
+# so the page is one ordered read of the uq_Area_state_city index. Rows are
+# rebuilt for just the areas a write touches: venue inserts, deletes and
+# renames/moves here, upcoming-show counter changes from counters.py.
+# Concurrent writers touching the same area are serialized by _lock_areas.
+
+
+def _in_areas(city_column, state_column, keys):
+    # IS NOT DISTINCT FROM so venues without a city or state still match
+    return or_(
+        *[
+            and_(
+                city_column.isnot_distinct_from(city),
+                state_column.isnot_distinct_from(state),
+            )
+            for city, state in keys
+        ]
+    )
+
+
+def _lock_id(city, state):
+    # stable across processes, unlike hash()
+    return zlib.crc32(f"Area\0{state}\0{city}".encode("utf-8"))
+
+
+def _lock_areas(session, keys):
+    """
+    Serialize PostgreSQL transactions rebuilding the same areas until they
+    end. Keyed rebuilds share the table in ROW EXCLUSIVE mode, wait for a
+    full rebuild's EXCLUSIVE lock, and queue per area on advisory locks,
+    taken in one statement in sorted order so they cannot deadlock there.
+    The venues are read after this, so they include those of a transaction
+    that held the lock before.
+    """
+    if keys is None:
+        session.execute(text('LOCK TABLE "Area" IN EXCLUSIVE MODE'))
+        return
+    session.execute(text('LOCK TABLE "Area" IN ROW EXCLUSIVE MODE'))
+    session.execute(
+        text(
+            "SELECT pg_advisory_xact_lock(k) FROM "
+            "(SELECT unnest(CAST(:ids AS bigint[])) AS k ORDER BY k) AS ids"
+        ),
+        {"ids": sorted({_lock_id(city, state) for city, state in keys})},
+    )
+
+
+def refresh_areas(session, keys=None):
+    """
+    Rebuild the Area rows of the given ``(city, state)`` keys from Venue, or
+    every row when ``keys`` is None. Three statements whatever the count,
+    plus the locks of _lock_areas on PostgreSQL, where rows are upserted
+    (INSERT ... ON CONFLICT) and only emptied areas are deleted.
+    """
+    area = Area.__table__
+    query = session.query(
+        Venue.id, Venue.name, Venue.city, Venue.state, Venue.upcoming_shows_count
+    )
+    if keys is not None:
+        keys = set(keys)
+        if not keys:
+            return
+        query = query.filter(_in_areas(Venue.city, Venue.state, keys))
+    postgresql = session.get_bind().dialect.name == "postgresql"
+    if postgresql:
+        _lock_areas(session, keys)
+    grouped = {}
+    for venue_id, name, city, state, upcoming in query.order_by(Venue.id):
+        grouped.setdefault((city, state), []).append(
+            {"id": venue_id, "name": name, "num_upcoming_shows": upcoming}
+        )
+    rows = [
+        {
+            "city": city,
+            "state": state,
+            "venue_count": len(venues),
+            "upcoming_shows_count": sum(v["num_upcoming_shows"] for v in venues),
+            "venues": json.dumps(venues),
+        }
+        for (city, state), venues in grouped.items()
+    ]
+    upserted = []
+    if postgresql and keys is not None:
+        # NULLs never conflict in uq_Area_state_city, those are reinserted
+        upserted = [row for row in rows if None not in (row["city"], row["state"])]
+        rows = [row for row in rows if None in (row["city"], row["state"])]
+    delete = area.delete()
+    if keys is not None:
+        kept = {(row["city"], row["state"]) for row in upserted}
+        if keys - kept:
+            session.execute(
+                delete.where(_in_areas(area.c.city, area.c.state, keys - kept))
+            )
+    else:
+        session.execute(delete)
+    if upserted:
+        insert = postgresql_insert(area)
+        session.execute(
+            insert.on_conflict_do_update(
+                index_elements=["state", "city"],
+                set_={
+                    name: insert.excluded[name]
+                    for name in ("venue_count", "upcoming_shows_count", "venues")
+                },
+            ),
+            upserted,
+        )
+    if rows:
+        session.execute(area.insert(), rows)
+
+
+def refresh_venue_areas(session, venue_ids):
+    """Rebuild the areas of the given venues, e.g. after their counters moved."""
+    venue_ids = sorted(i for i in venue_ids if i is not None)
+    if venue_ids:
+        keys = session.query(Venue.city, Venue.state).filter(Venue.id.in_(venue_ids))
+        refresh_areas(session, keys.distinct().all())
+
+
+def _touched_keys(session):
+    keys = set()
+    for venue in session.new | session.dirty | session.deleted:
+        if not isinstance(venue, Venue):
+            continue
+        state = inspect(venue)
+        changed = [state.attrs[name].history for name in ("name", "city", "state")]
+        if venue in session.dirty and not any(h.has_changes() for h in changed):
+            continue
+        keys.add((venue.city, venue.state))
+        # the area a venue moved away from loses it
+        old_city = changed[1].deleted[0] if changed[1].deleted else venue.city
+        old_state = changed[2].deleted[0] if changed[2].deleted else venue.state
+        keys.add((old_city, old_state))
+    return keys
+
+
+@event.listens_for(Session, "after_flush")
+def _venues_flushed(session, flush_context):
+    refresh_areas(session, _touched_keys(session))
@@ -0,0 +1,276 @@
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+from sqlalchemy import and_, event, inspect, or_
+from sqlalchemy.orm import Session
+
+from models import MAX_SHOW_DURATION, SHOW_DURATION, Show, Venue, db
+
+
+# ----------------------------------------------------------------------------#
+# Bookings.
+# ----------------------------------------------------------------------------#
+# A show books its venue and its artist for [start_time, end_time). No show
+# lasts longer than MAX_SHOW_DURATION, so the shows overlapping a window all
+# start within MAX_SHOW_DURATION before it and the lookup is a bounded range
+# of ix_Show_venue_id_start_time / ix_Show_artist_id_start_time.
+
+
+def end_of(start_time, end_time=None):
+    """The end of a booking, SHOW_DURATION after the start unless given."""
+    return end_time or start_time + SHOW_DURATION
+
+
+def overlapping(start, end):
+    """Shows overlapping [start, end)."""
+    return and_(
+        Show.start_time < end,
+        Show.start_time > start - MAX_SHOW_DURATION,
+        Show.end_time > start,
+    )
+
+
+def conflicts(venue_id, artist_id, start, end, exclude=None):
+    """
+    Shows booking the venue or the artist at some point of [start, end),
+    other than the show ``exclude`` (the one being written).
+    """
+    query = db.session.query(
+        Show.id, Show.venue_id, Show.artist_id, Show.start_time
+    ).filter(
+        or_(Show.venue_id == venue_id, Show.artist_id == artist_id),
+        overlapping(start, end),
+    )
+    if exclude is not None:
+        query = query.filter(Show.id != exclude)
+    return query.order_by(Show.start_time).all()
+
+
+def conflict_errors(venue_id, artist_id, start, end, exclude=None):
+    """Form-style errors for the bookings [start, end) collides with."""
+    errors = []
+    for show in conflicts(venue_id, artist_id, start, end, exclude):
+        who = "Venue" if show.venue_id == venue_id else "Artist"
+        errors.append(
+            f"{who} is already booked for show {show.id} at {show.start_time}"
+        )
+    return {"start_time": errors} if errors else None
+
+
+# ----------------------------------------------------------------------------#
+# In-memory calendars.
+# ----------------------------------------------------------------------------#
+
+
+class Calendar:
+    """
+    Bookings of many venues (or artists), per key sorted by start along with
+    the running maximum of their ends. Whether a key is busy during a window
+    is then one bisect, whatever the number of its bookings.
+    """
+
+    def __init__(self):
+        self._starts = {}
+        self._ends = {}
+        self._reach = {}
+
+    def add(self, key, start, end):
+        starts = self._starts.setdefault(key, [])
+        reach = self._reach.setdefault(key, [])
+        i = bisect_right(starts, start)
+        starts.insert(i, start)
+        self._ends.setdefault(key, []).insert(i, end)
+        reach.insert(i, max(end, reach[i - 1]) if i else end)
+        # later maxima only grow, up to the first one already past ``end``
+        for j in range(i + 1, len(reach)):
+            if reach[j] >= end:
+                break
+            reach[j] = end
+
+    def remove(self, key, start, end):
+        """Drop one booking [start, end) of ``key``, if there is one."""
+        starts, ends = self._starts.get(key, []), self._ends.get(key, [])
+        i = bisect_left(starts, start)
+        while i < len(starts) and starts[i] == start and ends[i] != end:
+            i += 1
+        if i == len(starts) or starts[i] != start:
+            return
+        reach = self._reach[key]
+        del starts[i], ends[i], reach[i]
+        # later maxima may have been the removed end, recompute them until
+        # one comes out unchanged
+        for j in range(i, len(reach)):
+            value = max(ends[j], reach[j - 1]) if j else ends[j]
+            if value == reach[j]:
+                break
+            reach[j] = value
+
+    def busy(self, key, start, end):
+        starts = self._starts.get(key)
+        if not starts:
+            return False
+        # bookings starting before ``end``; one of them overlaps when the
+        # latest of their ends is after ``start``
+        i = bisect_left(starts, end)
+        return i > 0 and self._reach[key][i - 1] > start
+
+
+class AvailabilityIndex:
+    """
+    Process-wide Calendar of the venue bookings that end after ``horizon``
+    (the load time), answering availability for windows from then on.
+
+    Show writes committed in this process are applied to it as they commit;
+    writes from other processes (and bulk loads that bypass the session)
+    are seen once it is reloaded, after ``ttl`` seconds or ``invalidate``.
+    """
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._calendar = None
+        self._horizon = None
+        self._loaded_at = 0.0
+        # bumped by every apply, so a load racing a commit is not kept
+        self._applied = 0
+
+    def load(self, now: datetime = None):
+        now = now or datetime.now()
+        with self._lock:
+            applied = self._applied
+        rows = db.session.query(Show.venue_id, Show.start_time, Show.end_time).filter(
+            Show.start_time > now - MAX_SHOW_DURATION, Show.end_time > now
+        )
+        calendar = Calendar()
+        for venue_id, start, end in rows:
+            calendar.add(venue_id, start, end)
+        with self._lock:
+            self._calendar = calendar if applied == self._applied else None
+            self._horizon = now
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        with self._lock:
+            self._calendar = None
+
+    def apply(self, removed, added):
+        """Move committed ``(venue_id, start, end)`` bookings."""
+        with self._lock:
+            self._applied += 1
+            if self._calendar is None:
+                return
+            for booking in removed:
+                self._calendar.remove(*booking)
+            for booking in added:
+                self._calendar.add(*booking)
+
+    def booked(self, venue_ids, start, end):
+        """
+        The venues of ``venue_ids`` booked at some point of [start, end),
+        loading the calendar when missing or expired. None when the window
+        starts before the horizon.
+        """
+        with self._lock:
+            expired = time.monotonic() - self._loaded_at > self.ttl
+            missing = self._calendar is None
+        if missing or expired:
+            self.load()
+        with self._lock:
+            if self._calendar is None or start < self._horizon:
+                return None
+            return {i for i in venue_ids if self._calendar.busy(i, start, end)}
+
+
+availability_index = AvailabilityIndex()
+
+
+def free_venues(city, state, start, end):
+    """
+    (id, name, city, state) of the venues of a city not booked at any point
+    of [start, end). Windows the index can't answer are checked with one
+    bounded query instead.
+    """
+    venues = (
+        db.session.query(Venue.id, Venue.name, Venue.city, Venue.state)
+        .filter(Venue.state == state, Venue.city == city)
+        .order_by(Venue.id)
+        .all()
+    )
+    ids = [venue.id for venue in venues]
+    busy = availability_index.booked(ids, start, end)
+    if busy is None:
+        booked = (
+            db.session.query(Show.venue_id)
+            .filter(Show.venue_id.in_(ids), overlapping(start, end))
+            .distinct()
+        )
+        busy = {venue_id for venue_id, in booked}
+    return [venue for venue in venues if venue.id not in busy]
+
+
+# ----------------------------------------------------------------------------#
+# Keeping the index current.
+# ----------------------------------------------------------------------------#
+# Bookings a flush moved are collected in session.info["bookings"] as
+# (removed, added) and applied once the transaction commits.
+
+BOOKING = ("venue_id", "start_time", "end_time")
+
+
+def _booking(show, before):
+    """(venue_id, start, end) of a flushed Show, before or after the flush."""
+    attrs = inspect(show).attrs
+    values = []
+    for name in BOOKING:
+        history = attrs[name].history
+        value = history.non_added() if before else history.non_deleted()
+        if not value:
+            # never loaded, only a reload would tell
+            return None
+        values.append(value[0])
+    return tuple(values)
+
+
+def record_bookings(session, removed=(), added=()):
+    """Queue bookings for the index, e.g. of shows written without the ORM."""
+    queued_removed, queued_added = session.info.setdefault("bookings", ([], []))
+    queued_removed.extend(removed)
+    queued_added.extend(added)
+
+
+@event.listens_for(Session, "after_flush")
+def _shows_flushed(session, flush_context):
+    removed, added = [], []
+    for show in session.new:
+        if isinstance(show, Show):
+            added.append(_booking(show, before=False))
+    for show in session.dirty:
+        if isinstance(show, Show) and session.is_modified(show):
+            old, new = _booking(show, before=True), _booking(show, before=False)
+            if old != new:
+                removed.append(old)
+                added.append(new)
+    for show in session.deleted:
+        if isinstance(show, Show):
+            removed.append(_booking(show, before=True))
+    if removed or added:
+        record_bookings(session, removed, added)
+
+
+@event.listens_for(Session, "after_commit")
+def _shows_committed(session):
+    bookings = session.info.pop("bookings", None)
+    if bookings is None:
+        return
+    removed, added = bookings
+    if None in removed or None in added:
+        availability_index.invalidate()
+    else:
+        availability_index.apply(removed, added)
+
+
+@event.listens_for(Session, "after_rollback")
+def _shows_rolled_back(session):
+    session.info.pop("bookings", None)
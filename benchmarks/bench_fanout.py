@@ -0,0 +1,75 @@
+"""
+Detail-page fan-out benchmark.
+
+Times the venue and artist detail pages with their queries run one after
+another (DETAIL_FANOUT_WORKERS=0) and concurrently (--workers), with
+--latency milliseconds of simulated network round trip added to every
+statement. The response cache is off. Run benchmarks/dataset.py first.
+
+    DATABASE_URL=sqlite:////tmp/fyyur_bench.db python benchmarks/bench_fanout.py
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.engine import Engine  # noqa: E402
+
+from app import create_app  # noqa: E402
+
+# flask_wtf.Form deprecation, raised on every form instantiation
+warnings.filterwarnings("ignore", message='"flask_wtf.Form" has been renamed')
+
+
+def add_latency(ms):
+    def delay(*args):
+        time.sleep(ms / 1000)
+
+    event.listen(Engine, "before_cursor_execute", delay)
+
+
+def measure(client, url, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url)
+        samples.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, (url, response.status_code)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=2.0, help="ms per statement")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    add_latency(args.latency)
+    urls = ["/venues/1", "/venues/1000", "/artists/1", "/artists/2000"]
+    modes = {"sequential": 0, f"fanout({args.workers})": args.workers}
+    results = {}
+    for mode, workers in modes.items():
+        app = create_app(
+            {"DETAIL_FANOUT_WORKERS": workers, "RESPONSE_CACHE_BACKEND": "none"}
+        )
+        client = app.test_client()
+        for url in urls:
+            client.get(url)  # warm up
+            results[mode, url] = measure(client, url, args.repeat)
+
+    sequential, fanout = modes
+    print(f"median ms with {args.latency} ms per statement")
+    print(f"{'page':<16} {sequential:>12} {fanout:>12} {'speedup':>8}")
+    for url in urls:
+        before, after = results[sequential, url], results[fanout, url]
+        print(f"{url:<16} {before:>12.2f} {after:>12.2f} {before / after:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
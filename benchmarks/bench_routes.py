@@ -0,0 +1,280 @@
+"""
+Route benchmark suite.
+
+Generates a dataset with benchmarks/dataset.py, then drives every route of
+app.py (and the JSON API) through the Flask test client, recording latency
+percentiles, SQL statements and rows fetched per request. Results are
+compared with a stored baseline: more statements or rows than the baseline,
+or a median latency above it by more than --tolerance, is a regression and
+exits with status 1. --save writes the current run as the new baseline.
+
+The response cache is off unless --cache is given, so every request does
+its full work; write routes run last since they change the data.
+
+    python benchmarks/bench_routes.py --database-url sqlite:////tmp/fyyur_bench.db
+    python benchmarks/bench_routes.py --database-url postgresql://... --yes --save
+"""
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import time
+import warnings
+from datetime import datetime, timedelta
+from functools import wraps
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if "--cache" not in sys.argv:
+    os.environ["RESPONSE_CACHE_BACKEND"] = "none"
+
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.engine import ResultProxy  # noqa: E402
+
+from dataset import add_database_args, generate, scratch_app  # noqa: E402
+from models import db  # noqa: E402
+from queries import shows_page, venue_shows, window  # noqa: E402
+
+# flask_wtf.Form deprecation, raised on every form instantiation
+warnings.filterwarnings("ignore", message='"flask_wtf.Form" has been renamed')
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+class SQLStats:
+    """Statements executed and rows fetched since the last ``reset``."""
+
+    def __init__(self):
+        self.statements = 0
+        self.rows = 0
+
+    def reset(self):
+        self.statements = 0
+        self.rows = 0
+
+    def install(self, engine):
+        event.listen(engine, "before_cursor_execute", self._executed)
+        # rows are counted where ResultProxy pulls them from the DBAPI cursor;
+        # server-side (buffered) results are not used by the routes
+        for name in ("_fetchone_impl", "_fetchmany_impl", "_fetchall_impl"):
+            setattr(ResultProxy, name, self._counting(getattr(ResultProxy, name)))
+
+    def _executed(self, *args):
+        self.statements += 1
+
+    def _counting(self, method):
+        @wraps(method)
+        def wrapper(result, *args, **kwargs):
+            rows = method(result, *args, **kwargs)
+            if isinstance(rows, list):
+                self.rows += len(rows)
+            elif rows is not None:
+                self.rows += 1
+            return rows
+
+        return wrapper
+
+
+def venue_form(name):
+    return {
+        "name": name,
+        "city": "City 1",
+        "state": "CA",
+        "address": "1 Main St",
+        "phone": "415-555-0100",
+        "genres": ["Jazz"],
+        "facebook_link": "https://www.facebook.com/bench",
+        "website_link": "",
+        "seeking_description": "",
+    }
+
+
+def routes(args, cursors):
+    """(name, method, url or url(i), form data or data(i) or None) per route."""
+    hot, tail = 1, args.venues // 2
+    hot_artist, tail_artist = 1, args.artists // 2
+
+    def show(i):
+        # a new day every time, the same slot twice would be a booking conflict
+        day = datetime(2030, 1, 1) + timedelta(days=i)
+        start_time = day.strftime("%Y-%m-%d 20:00:00")
+        return {"venue_id": "1", "artist_id": "1", "start_time": start_time}
+
+    return [
+        ("index", "GET", "/", None),
+        ("search", "GET", "/search?search_term=musi", None),
+        ("venues", "GET", "/venues", None),
+        ("search_venues", "POST", "/venues/search", {"search_term": "musi"}),
+        ("show_venue hot", "GET", f"/venues/{hot}", None),
+        ("show_venue tail", "GET", f"/venues/{tail}", None),
+        (
+            "show_venue more",
+            "GET",
+            f"/venues/{hot}?past_before={cursors['past']}",
+            None,
+        ),
+        ("artists", "GET", "/artists", None),
+        ("search_artists", "POST", "/artists/search", {"search_term": "band"}),
+        ("show_artist hot", "GET", f"/artists/{hot_artist}", None),
+        ("show_artist tail", "GET", f"/artists/{tail_artist}", None),
+        ("shows", "GET", "/shows", None),
+        ("shows next", "GET", f"/shows?after={cursors['shows']}", None),
+        ("edit_venue", "GET", f"/venues/{hot}/edit", None),
+        ("edit_artist", "GET", f"/artists/{hot_artist}/edit", None),
+        ("create_venue_form", "GET", "/venues/create", None),
+        ("create_artist_form", "GET", "/artists/create", None),
+        ("create_shows", "GET", "/shows/create", None),
+        ("api venues", "GET", "/api/v1/venues?fields=id,name,genres", None),
+        ("api venue", "GET", f"/api/v1/venues/{hot}", None),
+        ("api artists", "GET", "/api/v1/artists", None),
+        ("api artist", "GET", f"/api/v1/artists/{hot_artist}", None),
+        ("api shows", "GET", "/api/v1/shows", None),
+        ("api search", "GET", "/api/v1/search?q=musi", None),
+        # writes
+        ("create_venue", "POST", "/venues/create", venue_form("Bench Hall")),
+        ("create_artist", "POST", "/artists/create", venue_form("Bench Band")),
+        ("create_show", "POST", "/shows/create", show),
+        ("edit_venue_submit", "POST", f"/venues/{tail}/edit", venue_form("Renamed")),
+        (
+            "edit_artist_submit",
+            "POST",
+            f"/artists/{tail_artist}/edit",
+            venue_form("Renamed"),
+        ),
+        # a different tail venue every time
+        ("delete_venue", "DELETE", lambda i: f"/venues/{args.venues - i}", None),
+    ]
+
+
+def percentile(samples, p):
+    return statistics.quantiles(samples, n=100, method="inclusive")[p - 1]
+
+
+def run(client, stats, method, url, data, warmup, repeat, token):
+    samples, statements, rows, statuses = [], 0, 0, set()
+    for i in range(warmup + repeat):
+        target = url(i) if callable(url) else url
+        form = data(i) if callable(data) else data
+        if form is not None:
+            form = {**form, "csrf_token": token}
+        stats.reset()
+        start = time.perf_counter()
+        response = client.open(target, method=method, data=form)
+        elapsed = (time.perf_counter() - start) * 1000
+        if i < warmup:
+            continue
+        samples.append(elapsed)
+        statements = max(statements, stats.statements)
+        rows = max(rows, stats.rows)
+        statuses.add(response.status_code)
+    return {
+        "p50": round(percentile(samples, 50), 3),
+        "p95": round(percentile(samples, 95), 3),
+        "p99": round(percentile(samples, 99), 3),
+        "statements": statements,
+        "rows": rows,
+        "status": sorted(statuses),
+    }
+
+
+def regressions(results, baseline, tolerance):
+    found = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        for key in ("statements", "rows"):
+            if result[key] > before[key]:
+                found.append(f"{name}: {key} {before[key]} -> {result[key]}")
+        if result["p50"] > before["p50"] * (1 + tolerance):
+            found.append(f"{name}: p50 {before['p50']:.2f} -> {result['p50']:.2f} ms")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    add_database_args(parser)
+    parser.add_argument("--venues", type=int, default=2_000)
+    parser.add_argument("--artists", type=int, default=4_000)
+    parser.add_argument("--shows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save", action="store_true", help="Overwrite the baseline.")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.5,
+        help="Allowed median latency growth over the baseline (0.5 = +50%%).",
+    )
+    parser.add_argument("--cache", action="store_true", help="Keep response cache.")
+    args = parser.parse_args()
+    app = scratch_app(args)
+
+    stats = SQLStats()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        generate(random.Random(args.seed), args.venues, args.artists, args.shows)
+        # second pages, the "next"/"load more" links of the first ones
+        cursors = {
+            "shows": shows_page(limit=app.config["SHOWS_PAGE_SIZE"])[1],
+            "past": window(
+                venue_shows(1, upcoming=False),
+                app.config["DETAIL_SHOWS_PAGE_SIZE"],
+            )[1],
+        }
+        dialect = db.engine.dialect.name
+        stats.install(db.engine)
+        db.session.remove()
+
+    client = app.test_client()
+    # the create/edit handlers expect a CSRF token, valid for the whole session
+    page = client.get("/venues/create").get_data(as_text=True)
+    token = re.search(r'name="csrf_token" type="hidden" value="([^"]+)"', page)
+    results = {}
+    print(f"{'route':<22} {'p50':>8} {'p95':>8} {'p99':>8} {'stmts':>6} {'rows':>7}")
+    for name, method, url, data in routes(args, cursors):
+        result = run(
+            client, stats, method, url, data, args.warmup, args.repeat, token.group(1)
+        )
+        results[name] = result
+        print(
+            f"{name:<22} {result['p50']:>8.2f} {result['p95']:>8.2f} "
+            f"{result['p99']:>8.2f} {result['statements']:>6} {result['rows']:>7}"
+            + ("" if result["status"][-1] < 400 else f"  status {result['status']}")
+        )
+
+    dataset = {
+        "dialect": dialect,
+        "venues": args.venues,
+        "artists": args.artists,
+        "shows": args.shows,
+        "seed": args.seed,
+        "cache": args.cache,
+    }
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump({"dataset": dataset, "routes": results}, f, indent=2)
+            f.write("\n")
+        print(f"baseline saved to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline["dataset"] != dataset:
+        print(f"baseline was recorded with {baseline['dataset']}, not compared")
+        return
+    found = regressions(results, baseline["routes"], args.tolerance)
+    for line in found:
+        print(f"[REGRESSION] {line}")
+    sys.exit(1 if found else 0)
+
+
+if __name__ == "__main__":
+    main()
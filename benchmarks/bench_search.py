@@ -0,0 +1,81 @@
+"""
+Search latency benchmark.
+
+Seeds Venue rows in steps up to --rows (one million by default) and, after
+each step, times the configured search backend against the plain ILIKE scan.
+An index-backed backend should stay roughly flat while ILIKE grows linearly.
+
+    python benchmarks/bench_search.py --database-url postgresql://... --yes
+    python benchmarks/bench_search.py --database-url sqlite:////tmp/fyyur_bench.db
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+from sqlalchemy import text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dataset import add_database_args, scratch_app, venue_rows  # noqa: E402
+from models import Venue, db  # noqa: E402
+from search import LikeSearch, get_search_backend  # noqa: E402
+
+# venue names are made of dataset.WORDS
+TERMS = ["musi", "velvet garden", "harbor", "zzq"]
+
+
+def time_search(backend, term, repeat, limit):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        backend.search(Venue, term, limit=limit)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    add_database_args(parser)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--steps", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    app = scratch_app(args)
+
+    rng = random.Random(args.seed)
+    # steps grow by 10x and finish at --rows, e.g. 1k, 10k, 100k, 1M
+    checkpoints = [args.rows // 10**n for n in reversed(range(args.steps))]
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        backend = get_search_backend()
+        backend.install(Venue)
+        scan = LikeSearch()
+        print(f"backend: {type(backend).__name__}")
+        print(f"{'rows':>10} {'term':>15} {'indexed ms':>11} {'ilike ms':>9}")
+        inserted = 0
+        for checkpoint in checkpoints:
+            while inserted < checkpoint:
+                batch = min(50_000, checkpoint - inserted)
+                db.session.execute(
+                    Venue.__table__.insert(),
+                    list(venue_rows(rng, inserted + 1, batch)),
+                )
+                inserted += batch
+            db.session.commit()
+            if db.engine.dialect.name == "postgresql":
+                db.session.execute(text('ANALYZE "Venue"'))
+                db.session.commit()
+            for term in TERMS:
+                indexed = time_search(backend, term, args.repeat, args.limit)
+                ilike = time_search(scan, term, args.repeat, args.limit)
+                print(f"{inserted:>10} {term:>15} {indexed:>11.2f} {ilike:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
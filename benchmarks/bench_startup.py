@@ -0,0 +1,85 @@
+"""
+Startup-time benchmark.
+
+Starts a fresh interpreter --repeat times and measures, in each, the cold
+import of app.py, create_app() and the first request (which also warms the
+genre cache), then prints the median and worst of each step. The modules
+imported before the first request are checked for the heavy ones that are
+meant to load lazily.
+
+The database must exist, e.g. after benchmarks/dataset.py or
+`flask db upgrade && flask seed`:
+
+    DATABASE_URL=sqlite:////tmp/fyyur_bench.db python benchmarks/bench_startup.py
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# run in the child, prints one JSON line
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+application = app.create_app()
+created = time.perf_counter()
+loaded = sorted(name for name in LAZY if name in sys.modules)
+response = application.test_client().get(PATH)
+served = time.perf_counter()
+print(json.dumps({
+    "import": (imported - started) * 1000,
+    "create_app": (created - imported) * 1000,
+    "first_request": (served - created) * 1000,
+    "status": response.status_code,
+    "loaded": loaded,
+}))
+"""
+
+# heavy modules app.py must not import at startup; babel is left out since
+# flask_wtf's i18n support imports it whenever it is installed
+LAZY = ("dateutil.parser",)
+
+STEPS = ("import", "create_app", "first_request")
+
+
+def probe(path):
+    code = f"LAZY = {LAZY!r}\nPATH = {path!r}\n" + PROBE
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--path", default="/venues", help="First request URL.")
+    args = parser.parse_args()
+
+    runs = [probe(args.path) for _ in range(args.repeat)]
+    print(f"{'step':<14} {'median':>8} {'max':>8}  (ms, {args.repeat} cold starts)")
+    for step in STEPS + ("total",):
+        samples = [
+            sum(run[s] for s in STEPS) if step == "total" else run[step] for run in runs
+        ]
+        print(f"{step:<14} {statistics.median(samples):>8.1f} {max(samples):>8.1f}")
+    statuses = sorted({run["status"] for run in runs})
+    print(f"first request {args.path}: status {statuses}")
+    loaded = sorted({name for run in runs for name in run["loaded"]})
+    if loaded:
+        print(f"imported at startup, expected lazily: {', '.join(loaded)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+Deterministic synthetic dataset for benchmarks.
+
+The same --seed always produces the same rows. Popularity is Zipf-skewed,
+as in production: low venue/artist/genre/city ids are the popular ones, so
+venue 1 hosts the most shows and a long tail hosts a handful each. Most
+shows are in the past.
+
+    python benchmarks/dataset.py --database-url sqlite:////tmp/fyyur_bench.db
+
+Every table of --database-url is dropped first. Anything but a SQLite file
+other than the application's DATABASE_URL also needs --yes; the benchmark
+scripts that regenerate the dataset share these options.
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from availability import availability_index  # noqa: E402
+from counters import roll_forward  # noqa: E402
+from facets import facet_counts  # noqa: E402
+from genres import genre_cache  # noqa: E402
+from models import (  # noqa: E402
+    SHOW_DURATION,
+    Artist,
+    Genre,
+    Show,
+    Venue,
+    artist_genre,
+    db,
+    venue_genre,
+)
+from search import install_search_indexes  # noqa: E402
+
+WORDS = [
+    "Hall",
+    "Club",
+    "Lounge",
+    "Music",
+    "Jazz",
+    "Blue",
+    "Red",
+    "Velvet",
+    "Garden",
+    "Tavern",
+    "Cellar",
+    "Rooftop",
+    "Electric",
+    "Moon",
+    "Sun",
+    "River",
+    "Harbor",
+    "Union",
+    "Palace",
+    "Square",
+    "Coffee",
+    "Pianos",
+]
+# the catalog of seeds.insert_genre, extended with numbered genres
+GENRES = [
+    "Alternative",
+    "Blues",
+    "Classical",
+    "Country",
+    "Electronic",
+    "Folk",
+    "Funk",
+    "Hip-Hop",
+    "Heavy Metal",
+    "Instrumental",
+    "Jazz",
+    "Musical Theatre",
+    "Pop",
+    "Punk",
+    "R&B",
+    "Reggae",
+    "Rock n Roll",
+    "Soul",
+    "Other",
+]
+STATES = ["CA", "NY", "TX", "IL", "WA", "FL", "MA", "CO", "OR", "GA"]
+
+BATCH = 50_000
+
+
+class Zipf:
+    """Draws 1..n with weight 1 / rank**skew."""
+
+    def __init__(self, rng, n, skew=1.1):
+        self.rng = rng
+        self.population = range(1, n + 1)
+        self.cum_weights = list(
+            itertools.accumulate(1 / rank**skew for rank in self.population)
+        )
+
+    def draw(self, k=1):
+        return self.rng.choices(self.population, cum_weights=self.cum_weights, k=k)
+
+    def distinct(self, k):
+        return sorted(set(self.draw(k)))
+
+
+def genre_names(count):
+    return GENRES[:count] + [f"Genre {i}" for i in range(len(GENRES) + 1, count + 1)]
+
+
+def city(rank):
+    return f"City {rank}", STATES[rank % len(STATES)]
+
+
+def venue_rows(rng, start, count, cities=None):
+    """Venues ``start``..``start + count - 1`` with three-word names."""
+    for i in range(start, start + count):
+        name = " ".join(rng.choice(WORDS) for _ in range(3)) + f" {i}"
+        city_name, state = city(cities.draw()[0]) if cities else ("San Francisco", "CA")
+        yield {
+            "id": i,
+            "name": name,
+            "city": city_name,
+            "state": state,
+            "address": f"{i} Main St",
+            "phone": f"415-555-{i % 10000:04d}",
+            "facebook_link": f"https://www.facebook.com/venue{i}",
+            "seeking_talent": i % 3 == 0,
+        }
+
+
+def artist_rows(rng, start, count, cities=None):
+    for i in range(start, start + count):
+        name = " ".join(rng.choice(WORDS) for _ in range(2)) + f" Band {i}"
+        city_name, state = city(cities.draw()[0]) if cities else ("San Francisco", "CA")
+        yield {
+            "id": i,
+            "name": name,
+            "city": city_name,
+            "state": state,
+            "phone": f"212-555-{i % 10000:04d}",
+            "facebook_link": f"https://www.facebook.com/artist{i}",
+            "seeking_venue": i % 4 == 0,
+        }
+
+
+def _insert(table, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH:
+            db.session.execute(table.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(table.insert(), batch)
+
+
+def generate(
+    rng, venues, artists, shows, genres=len(GENRES), now=None, skew=1.1, past=0.95
+):
+    """
+    Insert the dataset into empty tables, bring the maintained counters and
+    area summary up to date and install the search indexes. ``past`` is the
+    share of shows that already happened.
+    """
+    now = now or datetime.now()
+    # show times are local like datetime.now() comparisons, updated_at is UTC
+    updated_at = datetime.utcnow()
+    cities = Zipf(rng, max(1, venues // 50), skew)
+    popular_genres = Zipf(rng, genres, skew)
+    _insert(
+        Genre.__table__,
+        ({"id": i, "name": name} for i, name in enumerate(genre_names(genres), 1)),
+    )
+    for model, association, key, rows in (
+        (Venue, venue_genre, "venue_id", venue_rows(rng, 1, venues, cities)),
+        (Artist, artist_genre, "artist_id", artist_rows(rng, 1, artists, cities)),
+    ):
+        links = []
+
+        def tagged(rows):
+            for row in rows:
+                row["updated_at"] = updated_at
+                for genre_id in popular_genres.distinct(rng.randint(1, 3)):
+                    links.append({key: row["id"], "genre_id": genre_id})
+                yield row
+
+        _insert(model.__table__, tagged(rows))
+        _insert(association, links)
+    hosts = Zipf(rng, venues, skew)
+    performers = Zipf(rng, artists, skew)
+
+    def show_rows():
+        for start in range(0, shows, BATCH):
+            count = min(BATCH, shows - start)
+            for venue_id, artist_id in zip(hosts.draw(count), performers.draw(count)):
+                if rng.random() < past:
+                    minutes = -rng.randint(1, 3650 * 24 * 60)
+                else:
+                    minutes = rng.randint(1, 365 * 24 * 60)
+                start_time = now + timedelta(minutes=minutes)
+                yield {
+                    "venue_id": venue_id,
+                    "artist_id": artist_id,
+                    "start_time": start_time,
+                    "end_time": start_time + SHOW_DURATION,
+                    "updated_at": updated_at,
+                }
+
+    _insert(Show.__table__, show_rows())
+    db.session.commit()
+    genre_cache.invalidate()
+    availability_index.invalidate()
+    facet_counts.invalidate()
+    roll_forward(now, everything=True)
+    install_search_indexes()
+
+
+def add_database_args(parser):
+    parser.add_argument(
+        "--database-url",
+        required=True,
+        help="Scratch database whose tables are dropped and regenerated.",
+    )
+    parser.add_argument(
+        "--yes",
+        action="store_true",
+        help="Allow dropping a non-SQLite database or the application's own.",
+    )
+
+
+def scratch_app(args, **config):
+    """
+    The app on --database-url. Exits unless it is a SQLite database other
+    than the application's configured one, or --yes confirms the drop.
+    """
+    import config as settings
+    from app import create_app
+
+    url = args.database_url
+    if not args.yes and (
+        not url.startswith("sqlite") or url == settings.SQLALCHEMY_DATABASE_URI
+    ):
+        sys.exit(
+            f"refusing to drop every table of {url}; "
+            f"pass --yes if it is a scratch database"
+        )
+    return create_app({"SQLALCHEMY_DATABASE_URI": url, **config})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    add_database_args(parser)
+    parser.add_argument("--venues", type=int, default=2_000)
+    parser.add_argument("--artists", type=int, default=4_000)
+    parser.add_argument("--shows", type=int, default=100_000)
+    parser.add_argument("--genres", type=int, default=len(GENRES))
+    parser.add_argument("--skew", type=float, default=1.1)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    app = scratch_app(args)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        generate(
+            random.Random(args.seed),
+            args.venues,
+            args.artists,
+            args.shows,
+            genres=args.genres,
+            skew=args.skew,
+        )
+        print(
+            f"{args.venues} venues, {args.artists} artists, {args.shows} shows, "
+            f"{args.genres} genres"
+        )
+
+
+if __name__ == "__main__":
+    main()
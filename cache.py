@@ -0,0 +1,213 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import (
+    current_app,
+    g,
+    get_flashed_messages,
+    has_app_context,
+    make_response,
+    request,
+    session,
+)
+
+
+# ----------------------------------------------------------------------------#
+# Rendered-page cache.
+# ----------------------------------------------------------------------------#
+
+
+class LRUCache:
+    """In-memory LRU cache whose entries also expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisCache:
+    """Redis (or compatible) backend, shared by every worker. Needs ``redis``."""
+
+    def __init__(self, url, ttl=300, prefix="fyyur:page:"):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError(
+                "RESPONSE_CACHE_BACKEND=redis requires the redis package"
+            )
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return value.decode("utf-8") if value is not None else None
+
+    def set(self, key, value):
+        self.client.setex(self.prefix + key, self.ttl, value)
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*[self.prefix + key for key in keys])
+
+    def clear(self):
+        keys = list(self.client.scan_iter(self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+class _AppCache:
+    """The backend and hit/miss counts of one application."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        # updated by every request thread of the worker
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def count(self, hit):
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+
+class ResponseCache:
+    """
+    Caches the rendered HTML of detail pages keyed by entity, e.g. "venue:1".
+
+    Handlers that change a venue, artist or show call ``invalidate`` for the
+    pages that display it. Under ``conditional`` a body is stored with the
+    page version it was rendered for and only reused for that version, so a
+    page whose ETag moved (a show started, another worker wrote) is rendered
+    again; otherwise the TTL bounds how long a page can lag behind.
+
+    Each application keeps its own backend and counts in
+    ``app.extensions["response_cache"]``.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        name = app.config.get("RESPONSE_CACHE_BACKEND", "memory")
+        ttl = app.config.get("RESPONSE_CACHE_TTL", 300)
+        if name == "memory":
+            backend = LRUCache(app.config.get("RESPONSE_CACHE_SIZE", 1024), ttl)
+        elif name == "redis":
+            backend = RedisCache(app.config["RESPONSE_CACHE_REDIS_URL"], ttl)
+        elif name == "none":
+            backend = None
+        else:
+            raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND {name!r}")
+        app.extensions["response_cache"] = _AppCache(backend)
+
+    @staticmethod
+    def _state():
+        if not has_app_context():
+            return None
+        return current_app.extensions.get("response_cache")
+
+    @property
+    def backend(self):
+        """The current application's backend, None when caching is off."""
+        state = self._state()
+        return state.backend if state is not None else None
+
+    @staticmethod
+    def key(kind, entity_id):
+        return f"{kind}:{entity_id}"
+
+    def cached(self, kind):
+        """Cache a view that takes a ``<kind>_id`` argument, e.g. show_venue."""
+
+        def decorator(view):
+            @wraps(view)
+            def wrapper(**kwargs):
+                state = self._state()
+                # pages showing flashed messages are one-off, never reuse them;
+                # only the first window of shows ("load more" unused) is cached
+                if (
+                    state is None
+                    or state.backend is None
+                    or "_flashes" in session
+                    or request.args
+                ):
+                    return view(**kwargs)
+                key = self.key(kind, kwargs[f"{kind}_id"])
+                version = g.get("page_version", "")
+                entry = state.backend.get(key)
+                # "<version>\n<body>", versions are hex digests
+                cached_version, _, body = (entry or "").partition("\n")
+                if entry is not None and cached_version == version:
+                    state.count(hit=True)
+                    response = make_response(body)
+                    response.headers["X-Cache"] = "HIT"
+                    return response
+                state.count(hit=False)
+                response = make_response(view(**kwargs))
+                if response.status_code == 200 and not get_flashed_messages():
+                    body = response.get_data(as_text=True)
+                    state.backend.set(key, f"{version}\n{body}")
+                response.headers["X-Cache"] = "MISS"
+                return response
+
+            return wrapper
+
+        return decorator
+
+    def invalidate(self, kind, *entity_ids):
+        backend = self.backend
+        if backend is not None:
+            backend.delete(*[self.key(kind, i) for i in entity_ids])
+
+    def clear(self):
+        backend = self.backend
+        if backend is not None:
+            backend.clear()
+
+    def stats(self):
+        """Hits and misses of the current application."""
+        state = self._state()
+        if state is None:
+            return {"hits": 0, "misses": 0}
+        with state.lock:
+            return {"hits": state.hits, "misses": state.misses}
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,69 @@
+import hashlib
+from datetime import datetime
+from functools import wraps
+
+from flask import Response, g, make_response, request, session
+
+
+# ----------------------------------------------------------------------------#
+# Conditional GET.
+# ----------------------------------------------------------------------------#
+
+
+def conditional(version):
+    """
+    Add ETag/Last-Modified validators to a read view and answer
+    ``304 Not Modified`` without running it when the client copy is current.
+
+    ``version`` receives the view arguments and returns a row or mapping
+    that changes whenever the page does (see queries.*_version), or None
+    when the entity does not exist, in which case the view runs as usual.
+    Every value goes into the ETag; Last-Modified is the latest of the UTC
+    ``*updated_at`` ones, other datetimes (local show times) are left out. The ETag is
+    left in ``g.page_version`` for ResponseCache.cached below it.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            # pending flashed messages make the page one-off
+            if "_flashes" in session:
+                response = make_response(view(**kwargs))
+                response.cache_control.no_store = True
+                return response
+            values = version(**kwargs)
+            if values is None:
+                return view(**kwargs)
+            if not isinstance(values, dict):
+                values = values._asdict()
+            token = repr((request.full_path, tuple(values.items())))
+            etag = hashlib.sha1(token.encode("utf-8")).hexdigest()
+            # the response cache only reuses bodies rendered for this version
+            g.page_version = etag
+            dates = [
+                value
+                for name, value in values.items()
+                if name.endswith("updated_at") and isinstance(value, datetime)
+            ]
+            last_modified = max(dates).replace(microsecond=0) if dates else None
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains_weak(etag)
+            else:
+                since = request.if_modified_since
+                not_modified = bool(last_modified and since and last_modified <= since)
+            if not_modified:
+                response = Response(status=304)
+            else:
+                response = make_response(view(**kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            if last_modified:
+                response.last_modified = last_modified
+            # always revalidate, the validators make that a cheap check
+            response.cache_control.no_cache = True
+            return response
+
+        return wrapper
+
+    return decorator
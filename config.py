@@ -1,11 +1,18 @@
 import os
 
-SECRET_KEY = os.urandom(32)
+# Shared by every worker so sessions and CSRF tokens survive a different
+# worker answering; the random fallback is only fit for a single process.
+SECRET_KEY = os.getenv("SECRET_KEY") or os.urandom(32)
 # Grabs the folder where the script runs.
 basedir = os.path.abspath(os.path.dirname(__file__))
 
-# Enable debug mode.
-DEBUG = True
+# Debug mode (debugger, template reloading, propagated exceptions) only when
+# asked for with FLASK_DEBUG=1 or FLASK_ENV=development, never by default
+# under gunicorn.
+DEBUG = (
+    os.getenv("FLASK_DEBUG", "1" if os.getenv("FLASK_ENV") == "development" else "0")
+    == "1"
+)
 
 # Connect to the database
 
@@ -17,3 +24,80 @@ STRING_CONNECTION = "postgresql://{}:{}@{}/{}".format(
     DB_USER, DB_PASSWORD, DB_HOST, DB_NAME
 )
 SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", STRING_CONNECTION)
+# the session events used here do not need Flask-SQLAlchemy's own tracking
+SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+# Connection pool, per worker process. Every gunicorn worker (WEB_CONCURRENCY)
+# opens up to DB_POOL_SIZE + DB_MAX_OVERFLOW connections, so keep
+#   WEB_CONCURRENCY * (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+# below PostgreSQL's max_connections (100 by default) minus what migrations,
+# cron jobs and psql need. The defaults (4 workers * 10) use 40.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 5))
+# seconds to wait for a free connection before failing the request
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 10))
+# reconnect before PgBouncer/firewalls drop idle connections
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+# server-side cap per statement, 0 disables it
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 15000))
+
+
+def engine_options(uri):
+    """SQLALCHEMY_ENGINE_OPTIONS for ``uri``; pool settings only apply to servers."""
+    if not uri.startswith("postgresql"):
+        return {}
+    options = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    if DB_STATEMENT_TIMEOUT_MS:
+        options["connect_args"] = {
+            "options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+        }
+    return options
+
+
+SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+
+# Keyset pagination of /shows
+SHOWS_PAGE_SIZE = int(os.getenv("SHOWS_PAGE_SIZE", 30))
+SHOWS_MAX_PAGE_SIZE = int(os.getenv("SHOWS_MAX_PAGE_SIZE", 100))
+# Past/upcoming shows listed per "load more" window on venue/artist pages
+DETAIL_SHOWS_PAGE_SIZE = int(os.getenv("DETAIL_SHOWS_PAGE_SIZE", 12))
+
+# Threads running the independent queries of venue/artist pages concurrently
+# (fanout.py), shared by the whole process; 0 runs them one after another.
+# Each worker then needs up to GUNICORN_THREADS + DETAIL_FANOUT_WORKERS
+# connections, see DB_POOL_SIZE above.
+DETAIL_FANOUT_WORKERS = int(os.getenv("DETAIL_FANOUT_WORKERS", 0))
+
+# Name search backend: "postgresql" (pg_trgm), "sqlite" (FTS5) or "like".
+# Unset picks the one matching the database dialect.
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND")
+
+# Hits returned by /search and the venue/artist search pages (counts are
+# always complete)
+SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", 50))
+
+# Rendered venue/artist detail pages: "memory" (LRU + TTL), "redis" (needs the
+# redis package) or "none". The TTL bounds how long a page can take to move a
+# show from upcoming to past.
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", 300))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", 1024))
+RESPONSE_CACHE_REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Per-request SQL instrumentation (instrumentation.py): Server-Timing header and
+# a JSON log line for requests slower than SLOW_REQUEST_MS or running the same
+# statement N_PLUS_ONE_THRESHOLD times or more.
+INSTRUMENTATION_ENABLED = os.getenv("INSTRUMENTATION_ENABLED", "1") == "1"
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "1") == "1"
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", 500))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", 10))
+
+# Prometheus text metrics at /metrics (metrics.py), kept per worker process
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
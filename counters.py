@@ -0,0 +1,133 @@
+from datetime import datetime
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import and_, event, func, inspect, select, true
+from sqlalchemy.orm import Session
+
+from areas import refresh_areas, refresh_venue_areas
+from models import Artist, Show, Venue, db
+
+
+# ----------------------------------------------------------------------------#
+# Denormalized upcoming-show counters.
+# ----------------------------------------------------------------------------#
+# Venue and Artist carry ``upcoming_shows_count`` and ``next_show_time`` so list
+# and search pages read them instead of counting shows. They are refreshed in
+# the same transaction as any flush that adds, moves or deletes a Show, along
+# with the Area rows of the affected venues, and ``roll_forward`` recounts the
+# rows whose next show has started since. Renaming a venue or an artist also
+# bumps ``updated_at`` of the artists or venues it shares shows with, whose
+# pages list it.
+
+# model -> Show column pointing at it
+KEYS = ((Venue, Show.venue_id), (Artist, Show.artist_id))
+
+
+def counter_values(model, key_column, now: datetime = None):
+    """Correlated scalar subqueries computing both counters of a ``model`` row."""
+    now = now or datetime.now()
+    upcoming = and_(key_column == model.id, Show.start_time > now)
+    return {
+        "upcoming_shows_count": select([func.count(Show.id)])
+        .where(upcoming)
+        .as_scalar(),
+        "next_show_time": select([func.min(Show.start_time)])
+        .where(upcoming)
+        .as_scalar(),
+    }
+
+
+def refresh_statement(model, key_column, condition, now: datetime = None):
+    """UPDATE recounting the counters of the ``model`` rows matching ``condition``."""
+    return (
+        model.__table__.update()
+        .where(condition)
+        .values(**counter_values(model, key_column, now))
+    )
+
+
+def refresh(session, model, key_column, ids, now: datetime = None):
+    ids = sorted(i for i in ids if i is not None)
+    if ids:
+        session.execute(refresh_statement(model, key_column, model.id.in_(ids), now))
+
+
+def roll_forward(now: datetime = None, everything=False):
+    """
+    Recount the venues and artists whose next show is no longer upcoming, or
+    all of them with ``everything``. Meant to run periodically (cron) and
+    after writes that bypass the session, e.g. bulk ``Query.delete``.
+    """
+    now = now or datetime.now()
+    session = db.session
+    areas = None
+    if not everything:
+        areas = session.query(Venue.city, Venue.state).filter(
+            Venue.next_show_time <= now
+        )
+        areas = areas.distinct().all()
+    for model, key_column in KEYS:
+        condition = true() if everything else model.next_show_time <= now
+        session.execute(refresh_statement(model, key_column, condition, now))
+    refresh_areas(session, areas)
+    session.commit()
+
+
+def _touched_ids(session, attribute):
+    ids = set()
+    for obj in session.new | session.dirty | session.deleted:
+        if not isinstance(obj, Show):
+            continue
+        ids.add(getattr(obj, attribute))
+        # a show moved to another venue/artist changes the old one too
+        ids.update(inspect(obj).attrs[attribute].history.deleted)
+    return ids
+
+
+@event.listens_for(Session, "after_flush")
+def _shows_flushed(session, flush_context):
+    venue_ids = _touched_ids(session, "venue_id")
+    refresh(session, Venue, Show.venue_id, venue_ids)
+    refresh(session, Artist, Show.artist_id, _touched_ids(session, "artist_id"))
+    refresh_venue_areas(session, venue_ids)
+
+
+# fields of a venue or artist shown next to its shows on the other side's page
+LINKED_FIELDS = ("name", "image_link")
+
+
+def touch_linked(session, model, key_column, other_column, ids):
+    """
+    Bump ``updated_at`` of the ``model`` rows sharing a show with the given
+    ids of the other side, whose pages list their name and image.
+    """
+    ids = sorted(i for i in ids if i is not None)
+    if ids:
+        linked = select([key_column]).where(other_column.in_(ids))
+        session.execute(
+            model.__table__.update()
+            .where(model.id.in_(linked))
+            .values(updated_at=datetime.utcnow())
+        )
+
+
+@event.listens_for(Session, "after_flush")
+def _linked_fields_flushed(session, flush_context):
+    changed = {Venue: set(), Artist: set()}
+    for obj in session.dirty:
+        if type(obj) in changed:
+            attrs = inspect(obj).attrs
+            if any(attrs[name].history.has_changes() for name in LINKED_FIELDS):
+                changed[type(obj)].add(obj.id)
+    touch_linked(session, Artist, Show.artist_id, Show.venue_id, changed[Venue])
+    touch_linked(session, Venue, Show.venue_id, Show.artist_id, changed[Artist])
+
+
+@click.command("roll-forward-shows")
+@click.option("--all", "everything", is_flag=True, help="Recount every row.")
+@with_appcontext
+def roll_forward_command(everything):
+    """Refresh upcoming-show counters of shows that have started."""
+    roll_forward(everything=everything)
+    click.echo("Upcoming-show counters refreshed.")
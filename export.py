@@ -0,0 +1,228 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import and_, exists, or_
+
+from genres import genre_cache
+from importer import GENRE_SEPARATOR
+from models import Artist, Show, Venue, artist_genre, db, venue_genre
+from queries import genre_names, has_genre
+
+
+# ----------------------------------------------------------------------------#
+# Streaming export.
+# ----------------------------------------------------------------------------#
+# Rows are read through a server-side cursor (yield_per: a named cursor on
+# PostgreSQL) and encoded CHUNK at a time, so memory stays flat whatever the
+# table size. Venue and artist genres are fetched in one statement per chunk.
+# CSV cells list genres with the importer's separator.
+
+CHUNK = 1000
+
+FORMATS = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+
+SHOW_FIELDS = (
+    "id",
+    "start_time",
+    "end_time",
+    "venue_id",
+    "venue_name",
+    "artist_id",
+    "artist_name",
+)
+
+VENUE_FIELDS = (
+    "id",
+    "name",
+    "city",
+    "state",
+    "address",
+    "phone",
+    "website",
+    "facebook_link",
+    "seeking_talent",
+    "seeking_description",
+    "image_link",
+    "upcoming_shows_count",
+    "next_show_time",
+    "genres",
+)
+
+ARTIST_FIELDS = (
+    "id",
+    "name",
+    "city",
+    "state",
+    "phone",
+    "website",
+    "facebook_link",
+    "seeking_venue",
+    "seeking_description",
+    "image_link",
+    "upcoming_shows_count",
+    "next_show_time",
+    "genres",
+)
+
+# kind -> (model, show foreign key, genre association key, exported fields)
+KINDS = {
+    "shows": (Show, None, None, SHOW_FIELDS),
+    "venues": (Venue, Show.venue_id, venue_genre.c.venue_id, VENUE_FIELDS),
+    "artists": (Artist, Show.artist_id, artist_genre.c.artist_id, ARTIST_FIELDS),
+}
+
+
+def export_query(
+    kind,
+    since: datetime = None,
+    until: datetime = None,
+    venue_id=None,
+    artist_id=None,
+    genre=None,
+):
+    """
+    The rows of an export, in a stable order. Shows are filtered by start
+    time in [since, until), venue, artist and venue or artist genre. Venues
+    and artists are filtered by their own genre, and the other filters keep
+    those with a matching show (artists that played ``venue_id``, venues
+    with a show in the date range). Raises ValueError for an unknown genre.
+    """
+    model, show_key, genre_key, fields = KINDS[kind]
+    genre_id = None
+    if genre is not None:
+        genre_id = genre_cache.by_name.get(genre)
+        if genre_id is None:
+            raise ValueError(f"Unknown genre: {genre}")
+    shows = []
+    if since is not None:
+        shows.append(Show.start_time >= since)
+    if until is not None:
+        shows.append(Show.start_time < until)
+    if venue_id is not None and kind != "venues":
+        shows.append(Show.venue_id == venue_id)
+    if artist_id is not None and kind != "artists":
+        shows.append(Show.artist_id == artist_id)
+
+    if kind == "shows":
+        query = (
+            db.session.query(
+                Show.id,
+                Show.start_time,
+                Show.end_time,
+                Show.venue_id,
+                Venue.name.label("venue_name"),
+                Show.artist_id,
+                Artist.name.label("artist_name"),
+            )
+            .join(Venue, Show.venue_id == Venue.id)
+            .join(Artist, Show.artist_id == Artist.id)
+            .filter(*shows)
+        )
+        if genre_id is not None:
+            query = query.filter(
+                or_(
+                    has_genre(venue_genre.c.venue_id, Show.venue_id, genre_id),
+                    has_genre(artist_genre.c.artist_id, Show.artist_id, genre_id),
+                )
+            )
+        return query.order_by(Show.start_time, Show.id)
+
+    own_id = venue_id if kind == "venues" else artist_id
+    columns = [getattr(model, field) for field in fields if field != "genres"]
+    query = db.session.query(*columns)
+    if own_id is not None:
+        query = query.filter(model.id == own_id)
+    if shows:
+        query = query.filter(exists().where(and_(show_key == model.id, *shows)))
+    if genre_id is not None:
+        query = query.filter(has_genre(genre_key, model.id, genre_id))
+    return query.order_by(model.id)
+
+
+def export_records(kind, query):
+    """Dicts of the exported fields, streamed CHUNK rows at a time."""
+    model, show_key, genre_key, fields = KINDS[kind]
+    chunk = []
+    for row in query.yield_per(CHUNK):
+        chunk.append(row)
+        if len(chunk) >= CHUNK:
+            yield from _records(chunk, fields, genre_key)
+            chunk = []
+    if chunk:
+        yield from _records(chunk, fields, genre_key)
+
+
+def _records(rows, fields, genre_key):
+    genres = None
+    if genre_key is not None:
+        genres = genre_names(genre_key, [row.id for row in rows])
+    for row in rows:
+        record = row._asdict()
+        if genres is not None:
+            record["genres"] = genres[row.id]
+        yield {field: record[field] for field in fields}
+
+
+def _value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, list):
+        return GENRE_SEPARATOR.join(value)
+    return value
+
+
+def encode(records, fields, fmt):
+    """CSV (with a header row) or JSON-lines text, one string per CHUNK rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == "csv" else None
+    if writer is not None:
+        writer.writerow(fields)
+    count = 0
+    for record in records:
+        if writer is not None:
+            writer.writerow([_value(record[field]) for field in fields])
+        else:
+            buffer.write(json.dumps(record, default=datetime.isoformat) + "\n")
+        count += 1
+        if count % CHUNK == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export(kind, fmt, **filters):
+    """Encoded chunks of one export; see export_query for the filters."""
+    fields = KINDS[kind][3]
+    return encode(export_records(kind, export_query(kind, **filters)), fields, fmt)
+
+
+@click.command("export")
+@click.argument("kind", type=click.Choice(sorted(KINDS)))
+@click.argument("path", type=click.File("w", encoding="utf-8"), default="-")
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(sorted(FORMATS)),
+    help="Defaults to the file extension, jsonl for stdout.",
+)
+@click.option("--since", type=click.DateTime(), help="Shows starting at or after.")
+@click.option("--until", type=click.DateTime(), help="Shows starting before.")
+@click.option("--venue-id", type=int)
+@click.option("--artist-id", type=int)
+@click.option("--genre", help="Genre name.")
+@with_appcontext
+def export_command(kind, path, fmt, **filters):
+    """Export shows, venues or artists as CSV or JSON lines (stdout by default)."""
+    fmt = fmt or ("csv" if path.name.endswith(".csv") else "jsonl")
+    try:
+        chunks = export(kind, fmt, **filters)
+    except ValueError as error:
+        raise click.BadParameter(str(error), param_hint="--genre")
+    for chunk in chunks:
+        path.write(chunk)
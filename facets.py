@@ -0,0 +1,81 @@
+import threading
+import time
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from genres import genre_cache
+from models import Artist, Genre, Venue, artist_genre, db, venue_genre
+
+
+# ----------------------------------------------------------------------------#
+# Genre facet counts.
+# ----------------------------------------------------------------------------#
+
+# kind -> association foreign key counted per genre
+KEYS = {"venues": venue_genre.c.venue_id, "artists": artist_genre.c.artist_id}
+
+
+class FacetCounts:
+    """
+    Process-wide number of venues and of artists per genre, for the genre
+    facets of /venues and /artists.
+
+    Each kind is counted with one GROUP BY on its association table, read
+    from the (genre_id, ...) index alone, and kept until a venue, artist or
+    genre write commits in this process or ``ttl`` seconds pass (writes of
+    other processes).
+    """
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def load(self, kind):
+        key_column = KEYS[kind]
+        genre_id = key_column.table.c.genre_id
+        rows = db.session.query(genre_id, func.count(key_column)).group_by(genre_id)
+        by_id = genre_cache.by_id
+        # most used first, genres nothing is tagged with are left out
+        counts = sorted(
+            ((by_id.get(genre), count) for genre, count in rows),
+            key=lambda facet: (-facet[1], facet[0] or ""),
+        )
+        with self._lock:
+            self._counts[kind] = (counts, time.monotonic())
+        return counts
+
+    def invalidate(self):
+        with self._lock:
+            self._counts.clear()
+
+    def counts(self, kind):
+        """[(genre name, count)] of ``kind``, most used genre first."""
+        with self._lock:
+            cached = self._counts.get(kind)
+        if cached is None or time.monotonic() - cached[1] > self.ttl:
+            return self.load(kind)
+        return cached[0]
+
+
+facet_counts = FacetCounts()
+
+
+@event.listens_for(Session, "after_flush")
+def _catalog_flushed(session, flush_context):
+    # genre changes of a venue or artist mark it dirty
+    changed = session.new | session.dirty | session.deleted
+    if any(isinstance(instance, (Venue, Artist, Genre)) for instance in changed):
+        session.info["facets_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _catalog_committed(session):
+    if session.info.pop("facets_changed", False):
+        facet_counts.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _catalog_rolled_back(session):
+    session.info.pop("facets_changed", None)
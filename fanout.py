@@ -0,0 +1,74 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from flask import current_app, g
+
+from instrumentation import RequestStats, current_stats
+
+
+# ----------------------------------------------------------------------------#
+# Concurrent fan-out of independent queries.
+# ----------------------------------------------------------------------------#
+# A detail page runs a handful of queries that only depend on the page's id.
+# With DETAIL_FANOUT_WORKERS > 0 they run at the same time: the first one in
+# the request thread, the others on a shared thread pool, each thread in its
+# own app context and so its own session and pooled connection. With 0 (the
+# default) they run one after another in the request thread, as before.
+#
+# The pool is shared by all requests of a process, so a process needs up to
+# GUNICORN_THREADS + DETAIL_FANOUT_WORKERS connections; size DB_POOL_SIZE +
+# DB_MAX_OVERFLOW for that.
+
+
+class FanOut:
+    """Runs the independent queries of one request concurrently."""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        workers = app.config.get("DETAIL_FANOUT_WORKERS", 0)
+        executor = None
+        if workers > 0:
+            executor = ThreadPoolExecutor(workers, thread_name_prefix="fanout")
+        app.extensions["fanout"] = executor
+
+    def run(self, *calls):
+        """
+        Results of the zero-argument ``calls``, in order. Exceptions (e.g.
+        a 404 from get_or_404) are raised in the calling thread. Results
+        loaded in another thread are detached instances or plain rows, so
+        only attributes already loaded may be read.
+        """
+        executor = current_app.extensions.get("fanout")
+        if executor is None or len(calls) < 2:
+            return [call() for call in calls]
+        app = current_app._get_current_object()
+        stats = current_stats()
+        # one RequestStats per thread, added up here once they are done, so
+        # the request's counters are only ever updated by this thread
+        shares = [RequestStats() if stats is not None else None for _ in calls[1:]]
+        futures = [
+            executor.submit(self._call, app, share, call)
+            for share, call in zip(shares, calls[1:])
+        ]
+        try:
+            first = calls[0]()
+        finally:
+            # never leave queries running past the request, even on a 404
+            wait(futures)
+            for share in shares:
+                if share is not None:
+                    stats.merge(share)
+        return [first] + [future.result() for future in futures]
+
+    @staticmethod
+    def _call(app, stats, call):
+        # the session is scoped to the thread and removed with the context
+        with app.app_context():
+            # statements also count towards the request's instrumentation
+            g.sql_stats = stats
+            return call()
+
+
+fanout = FanOut()
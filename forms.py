@@ -7,7 +7,17 @@ from wtforms import (
     DateTimeField,
     BooleanField,
 )
-from wtforms.validators import DataRequired, AnyOf, URL, Optional, Regexp
+from wtforms.validators import (
+    DataRequired,
+    AnyOf,
+    URL,
+    Optional,
+    Regexp,
+    ValidationError,
+)
+
+from genres import genre_cache
+from models import MAX_SHOW_DURATION
 
 
 class ShowForm(Form):
@@ -16,6 +26,17 @@ class ShowForm(Form):
     start_time = DateTimeField(
         "start_time", validators=[DataRequired()], default=datetime.today()
     )
+    # empty: models.SHOW_DURATION after the start
+    end_time = DateTimeField("end_time", validators=[Optional()])
+
+    def validate_end_time(self, field):
+        start = self.start_time.data
+        if field.data is None or start is None:
+            return
+        if field.data <= start:
+            raise ValidationError("The show must end after it starts.")
+        if field.data - start > MAX_SHOW_DURATION:
+            raise ValidationError(f"A show lasts at most {MAX_SHOW_DURATION}.")
 
 
 class VenueForm(Form):
@@ -81,33 +102,8 @@ class VenueForm(Form):
     address = StringField("address", validators=[DataRequired()])
     phone = StringField("phone")
     image_link = StringField("image_link")
-    genres = SelectMultipleField(
-        # TODO: implement enum restriction
-        # I have implement a genre table
-        "genres",
-        validators=[DataRequired()],
-        choices=[
-            ("Alternative", "Alternative"),
-            ("Blues", "Blues"),
-            ("Classical", "Classical"),
-            ("Country", "Country"),
-            ("Electronic", "Electronic"),
-            ("Folk", "Folk"),
-            ("Funk", "Funk"),
-            ("Hip-Hop", "Hip-Hop"),
-            ("Heavy Metal", "Heavy Metal"),
-            ("Instrumental", "Instrumental"),
-            ("Jazz", "Jazz"),
-            ("Musical Theatre", "Musical Theatre"),
-            ("Pop", "Pop"),
-            ("Punk", "Punk"),
-            ("R&B", "R&B"),
-            ("Reggae", "Reggae"),
-            ("Rock n Roll", "Rock n Roll"),
-            ("Soul", "Soul"),
-            ("Other", "Other"),
-        ],
-    )
+    # choices come from the genre catalog, see __init__
+    genres = SelectMultipleField("genres", validators=[DataRequired()])
     facebook_link = StringField("facebook_link", validators=[URL()])
     website_link = StringField("website_link")
 
@@ -115,6 +111,10 @@ class VenueForm(Form):
 
     seeking_description = StringField("seeking_description")
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.genres.choices = genre_cache.choices()
+
 
 class ArtistForm(Form):
     name = StringField("name", validators=[DataRequired()])
@@ -182,31 +182,8 @@ class ArtistForm(Form):
         validators=[Optional(), Regexp(r"^\d{3}-\d{3}-\d{4}$")],
     )
     image_link = StringField("image_link")
-    genres = SelectMultipleField(
-        "genres",
-        validators=[DataRequired()],
-        choices=[
-            ("Alternative", "Alternative"),
-            ("Blues", "Blues"),
-            ("Classical", "Classical"),
-            ("Country", "Country"),
-            ("Electronic", "Electronic"),
-            ("Folk", "Folk"),
-            ("Funk", "Funk"),
-            ("Hip-Hop", "Hip-Hop"),
-            ("Heavy Metal", "Heavy Metal"),
-            ("Instrumental", "Instrumental"),
-            ("Jazz", "Jazz"),
-            ("Musical Theatre", "Musical Theatre"),
-            ("Pop", "Pop"),
-            ("Punk", "Punk"),
-            ("R&B", "R&B"),
-            ("Reggae", "Reggae"),
-            ("Rock n Roll", "Rock n Roll"),
-            ("Soul", "Soul"),
-            ("Other", "Other"),
-        ],
-    )
+    # choices come from the genre catalog, see __init__
+    genres = SelectMultipleField("genres", validators=[DataRequired()])
     facebook_link = StringField(
         # DONE: implement enum restriction
         "facebook_link",
@@ -218,3 +195,7 @@ class ArtistForm(Form):
     seeking_venue = BooleanField("seeking_venue")
 
     seeking_description = StringField("seeking_description")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.genres.choices = genre_cache.choices()
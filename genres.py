@@ -0,0 +1,91 @@
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+
+from models import Genre, db
+
+
+# ----------------------------------------------------------------------------#
+# Genre catalog cache.
+# ----------------------------------------------------------------------------#
+
+
+class GenreCache:
+    """
+    Process-wide name -> id / id -> name map of the Genre table.
+
+    The catalog is tiny and almost never changes, so it is read once and
+    kept until a Genre row is inserted, updated or deleted.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_name = None
+        self._by_id = None
+
+    def load(self):
+        rows = db.session.query(Genre.id, Genre.name).order_by(Genre.id).all()
+        with self._lock:
+            self._by_name = {name: genre_id for genre_id, name in rows}
+            self._by_id = {genre_id: name for genre_id, name in rows}
+
+    def invalidate(self):
+        with self._lock:
+            self._by_name = None
+            self._by_id = None
+
+    @property
+    def by_name(self):
+        by_name = self._by_name
+        if by_name is None:
+            self.load()
+            by_name = self._by_name
+        return by_name
+
+    @property
+    def by_id(self):
+        by_id = self._by_id
+        if by_id is None:
+            self.load()
+            by_id = self._by_id
+        return by_id
+
+    def choices(self):
+        return [(name, name) for name in self.by_name]
+
+    def resolve(self, names):
+        """
+        Genre instances for the given names, attached to the current session
+        without querying the Genre table. Unknown names are skipped.
+        """
+        genres = []
+        for name in names:
+            genre_id = self.by_name.get(name)
+            if genre_id is None:
+                continue
+            genre = Genre(id=genre_id, name=name)
+            make_transient_to_detached(genre)
+            genres.append(db.session.merge(genre, load=False))
+        return genres
+
+
+genre_cache = GenreCache()
+
+
+@event.listens_for(Genre, "after_insert")
+@event.listens_for(Genre, "after_update")
+@event.listens_for(Genre, "after_delete")
+def _genre_changed(mapper, connection, target):
+    genre_cache.invalidate()
+    session = object_session(target)
+    if session is not None:
+        session.info["genres_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _genre_transaction_ended(session):
+    # drop whatever was loaded while the change was still uncommitted
+    if session.info.pop("genres_changed", False):
+        genre_cache.invalidate()
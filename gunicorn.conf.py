@@ -0,0 +1,30 @@
+import multiprocessing
+import os
+
+# ----------------------------------------------------------------------------#
+# Gunicorn settings, see config.py for the matching database pool settings.
+# ----------------------------------------------------------------------------#
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
+
+# one process per core (capped), each with a few threads for requests that
+# wait on PostgreSQL; keep workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) under
+# max_connections
+workers = int(os.getenv("WEB_CONCURRENCY", min(multiprocessing.cpu_count(), 4)))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+
+# the app is imported in each worker, so every process builds its own engine
+# and pool instead of sharing connections across fork
+preload_app = False
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = 30
+keepalive = 5
+# recycle workers now and then to bound memory growth
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = 200
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
@@ -0,0 +1,354 @@
+import csv
+import io
+import json
+import time
+from datetime import datetime
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import or_, text
+from werkzeug.datastructures import MultiDict
+
+from areas import refresh_areas, refresh_venue_areas
+from availability import Calendar, end_of, overlapping, record_bookings
+from counters import refresh
+from facets import facet_counts
+from forms import ArtistForm, ShowForm, VenueForm
+from genres import genre_cache
+from models import Artist, Show, Venue, artist_genre, db, venue_genre
+
+
+# ----------------------------------------------------------------------------#
+# Bulk import.
+# ----------------------------------------------------------------------------#
+# Streams CSV or JSON-lines files of venues, artists or shows. Every row goes
+# through the same form as the web UI (without CSRF); valid rows are written
+# in batches, each batch in its own transaction, and rejected rows are
+# reported with their line number and form errors.
+
+# kind -> (form, model, genre association table, association foreign key)
+KINDS = {
+    "venues": (VenueForm, Venue, venue_genre, "venue_id"),
+    "artists": (ArtistForm, Artist, artist_genre, "artist_id"),
+    "shows": (ShowForm, Show, None, None),
+}
+
+# CSV cells holding several genres separate them with this
+GENRE_SEPARATOR = ";"
+
+
+class InvalidRecord(ValueError):
+    """A line that does not hold a record, rejected like an invalid row."""
+
+
+def read_rows(stream, fmt):
+    """
+    Yield ``(line number, dict)`` for each record of a CSV/JSON-lines stream,
+    or ``(line number, InvalidRecord)`` for a JSON line that is malformed or
+    not an object.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            if row.get("genres"):
+                row["genres"] = row["genres"].split(GENRE_SEPARATOR)
+            yield reader.line_num, row
+    else:
+        for number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as error:
+                record = InvalidRecord(f"invalid JSON: {error}")
+            else:
+                if not isinstance(record, dict):
+                    record = InvalidRecord("not a JSON object")
+            yield number, record
+
+
+def formdata(row):
+    """A record as the MultiDict a form POST would produce."""
+    data = MultiDict()
+    for key, value in row.items():
+        if value is None:
+            continue
+        for item in value if isinstance(value, list) else [value]:
+            # BooleanField only treats "false" and "" as false
+            if isinstance(item, bool):
+                item = "true" if item else "false"
+            data.add(key, str(item).strip())
+    return data
+
+
+# ----------------------------------------------------------------------------#
+# Writers.
+# ----------------------------------------------------------------------------#
+
+
+class ExecutemanyWriter:
+    """Plain multi-row INSERT through the driver's executemany (SQLite)."""
+
+    def __init__(self, session):
+        self.session = session
+
+    def reserve_ids(self, model, count):
+        # take SQLite's write lock before reading max(id): other writers (the
+        # web app) then wait for this batch to commit instead of taking the
+        # same ids. pysqlite only opens a transaction for DML, so none is
+        # open yet unless this one has already written and holds the lock.
+        if self.session.bind.dialect.name == "sqlite":
+            dbapi_connection = self.session.connection().connection.connection
+            if not dbapi_connection.in_transaction:
+                self.session.execute(text("BEGIN IMMEDIATE"))
+        last = self.session.execute(
+            text(f'SELECT coalesce(max(id), 0) FROM "{model.__tablename__}"')
+        ).scalar()
+        return list(range(last + 1, last + count + 1))
+
+    def write(self, table, rows):
+        if rows:
+            self.session.execute(table.insert(), rows)
+
+
+class CopyWriter(ExecutemanyWriter):
+    """PostgreSQL COPY FROM STDIN in text format, ids drawn from the sequence."""
+
+    def reserve_ids(self, model, count):
+        name = model.__tablename__
+        rows = self.session.execute(
+            text(
+                f"SELECT nextval(pg_get_serial_sequence('\"{name}\"', 'id')) "
+                f"FROM generate_series(1, :count)"
+            ),
+            {"count": count},
+        )
+        return [row[0] for row in rows]
+
+    @staticmethod
+    def _value(value):
+        if value is None:
+            return "\\N"
+        if isinstance(value, bool):
+            return "t" if value else "f"
+        if isinstance(value, datetime):
+            return value.isoformat()
+        value = str(value)
+        for char, escaped in (
+            ("\\", "\\\\"),
+            ("\t", "\\t"),
+            ("\n", "\\n"),
+            ("\r", "\\r"),
+        ):
+            value = value.replace(char, escaped)
+        return value
+
+    def write(self, table, rows):
+        if not rows:
+            return
+        columns = list(rows[0])
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write("\t".join(self._value(row[c]) for c in columns) + "\n")
+        buffer.seek(0)
+        names = ", ".join(f'"{c}"' for c in columns)
+        cursor = self.session.connection().connection.cursor()
+        try:
+            cursor.copy_expert(f'COPY "{table.name}" ({names}) FROM STDIN', buffer)
+        finally:
+            cursor.close()
+
+
+WRITERS = {"postgresql": CopyWriter}
+
+
+def get_writer(session):
+    return WRITERS.get(session.bind.dialect.name, ExecutemanyWriter)(session)
+
+
+# ----------------------------------------------------------------------------#
+# Import.
+# ----------------------------------------------------------------------------#
+
+
+class Importer:
+    """
+    Validates and writes one kind of record. ``on_reject(line, errors)`` is
+    called for every rejected row as it is found, so nothing accumulates.
+    """
+
+    def __init__(self, kind, on_reject, batch_size=5000, now: datetime = None):
+        self.kind = kind
+        self.form_class, self.model, self.association, self.foreign_key = KINDS[kind]
+        self.batch_size = batch_size
+        # written to updated_at, which is UTC like the models' default
+        self.now = now or datetime.utcnow()
+        self.session = db.session
+        self.writer = get_writer(self.session)
+        # one form re-processed per row, so genre choices are built once
+        self.form = self.form_class(formdata=None, meta={"csrf": False})
+        self.on_reject = on_reject
+        self.accepted = 0
+        self.rejected = 0
+
+    def validate(self, row):
+        """Model column values for a record, or the form errors."""
+        if isinstance(row, InvalidRecord):
+            return None, {"record": [str(row)]}
+        form = self.form
+        form.process(formdata(row))
+        if not form.validate():
+            return None, form.errors
+        data = dict(form.data)
+        data.pop("csrf_token", None)
+        if self.kind == "shows":
+            try:
+                data["venue_id"] = int(data["venue_id"])
+                data["artist_id"] = int(data["artist_id"])
+            except (TypeError, ValueError):
+                return None, {"id": ["venue_id and artist_id must be integers"]}
+            data["end_time"] = end_of(data["start_time"], data["end_time"])
+        else:
+            data["website"] = data.pop("website_link")
+            data["upcoming_shows_count"] = 0
+            data["next_show_time"] = None
+        data["updated_at"] = self.now
+        return data, None
+
+    def _existing_ids(self, model, ids):
+        rows = self.session.query(model.id).filter(model.id.in_(set(ids)))
+        return {row[0] for row in rows}
+
+    def _bookings(self, venues, artists, batch):
+        """Calendars of the existing shows of these venues and artists."""
+        start = min(data["start_time"] for _, data in batch)
+        end = max(data["end_time"] for _, data in batch)
+        rows = self.session.query(
+            Show.venue_id, Show.artist_id, Show.start_time, Show.end_time
+        ).filter(
+            or_(Show.venue_id.in_(venues), Show.artist_id.in_(artists)),
+            overlapping(start, end),
+        )
+        venue_calendar, artist_calendar = Calendar(), Calendar()
+        for venue_id, artist_id, show_start, show_end in rows:
+            venue_calendar.add(venue_id, show_start, show_end)
+            artist_calendar.add(artist_id, show_start, show_end)
+        return venue_calendar, artist_calendar
+
+    def write_batch(self, batch):
+        """
+        Write validated ``(line, data)`` pairs in one transaction, along with
+        the counters and Area rows they change.
+        """
+        if self.kind == "shows":
+            venues = self._existing_ids(Venue, [d["venue_id"] for _, d in batch])
+            artists = self._existing_ids(Artist, [d["artist_id"] for _, d in batch])
+            # rows are checked against the database and the batch's earlier rows
+            venue_calendar, artist_calendar = self._bookings(venues, artists, batch)
+            valid = []
+            for line, data in batch:
+                venue_id, artist_id = data["venue_id"], data["artist_id"]
+                span = data["start_time"], data["end_time"]
+                if venue_id not in venues:
+                    self.reject(line, {"venue_id": ["unknown venue"]})
+                elif artist_id not in artists:
+                    self.reject(line, {"artist_id": ["unknown artist"]})
+                elif venue_calendar.busy(venue_id, *span):
+                    self.reject(line, {"start_time": ["venue already booked"]})
+                elif artist_calendar.busy(artist_id, *span):
+                    self.reject(line, {"start_time": ["artist already booked"]})
+                else:
+                    venue_calendar.add(venue_id, *span)
+                    artist_calendar.add(artist_id, *span)
+                    valid.append(data)
+            self.writer.write(Show.__table__, valid)
+            # COPY/executemany bypass the session, so refresh the counters here
+            refresh(self.session, Venue, Show.venue_id, venues)
+            refresh(self.session, Artist, Show.artist_id, artists)
+            # only the areas of venues that got a show have new counts
+            refresh_venue_areas(self.session, {data["venue_id"] for data in valid})
+            record_bookings(
+                self.session,
+                added=[
+                    (data["venue_id"], data["start_time"], data["end_time"])
+                    for data in valid
+                ],
+            )
+        else:
+            valid = [data for _, data in batch]
+            ids = self.writer.reserve_ids(self.model, len(valid))
+            links = []
+            for entity_id, data in zip(ids, valid):
+                data["id"] = entity_id
+                for name in data.pop("genres"):
+                    links.append(
+                        {
+                            self.foreign_key: entity_id,
+                            "genre_id": genre_cache.by_name[name],
+                        }
+                    )
+            self.writer.write(self.model.__table__, valid)
+            self.writer.write(self.association, links)
+            if self.kind == "venues":
+                refresh_areas(
+                    self.session, {(data["city"], data["state"]) for data in valid}
+                )
+            facet_counts.invalidate()
+        self.session.commit()
+        self.accepted += len(valid)
+
+    def reject(self, line, errors):
+        self.rejected += 1
+        self.on_reject(line, errors)
+
+    def run(self, rows):
+        batch = []
+        for line, row in rows:
+            data, errors = self.validate(row)
+            if errors:
+                self.reject(line, errors)
+                continue
+            batch.append((line, data))
+            if len(batch) >= self.batch_size:
+                self.write_batch(batch)
+                batch = []
+        if batch:
+            self.write_batch(batch)
+
+
+@click.command("import")
+@click.argument("kind", type=click.Choice(sorted(KINDS)))
+@click.argument("path", type=click.File("r", encoding="utf-8"))
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(["csv", "jsonl"]),
+    help="Defaults to the file extension.",
+)
+@click.option("--batch-size", default=5000, show_default=True)
+@click.option(
+    "--rejects",
+    type=click.File("w", encoding="utf-8"),
+    help="Write rejected rows as JSON lines of line number and errors.",
+)
+@with_appcontext
+def import_command(kind, path, fmt, batch_size, rejects):
+    """Bulk import venues, artists or shows from a CSV or JSON-lines file."""
+    fmt = fmt or ("csv" if path.name.endswith(".csv") else "jsonl")
+
+    def on_reject(line, errors):
+        if rejects is not None:
+            rejects.write(json.dumps({"line": line, "errors": errors}) + "\n")
+        else:
+            click.echo(f"line {line}: {errors}", err=True)
+
+    importer = Importer(kind, on_reject, batch_size=batch_size)
+    started = time.perf_counter()
+    importer.run(read_rows(path, fmt))
+    elapsed = time.perf_counter() - started
+    total = importer.accepted + importer.rejected
+    click.echo(
+        f"Imported {importer.accepted} of {total} {kind} "
+        f"({importer.rejected} rejected) in {elapsed:.1f}s, "
+        f"{total / elapsed if elapsed else 0:.0f} rows/s."
+    )
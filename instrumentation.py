@@ -0,0 +1,149 @@
+import json
+import time
+from collections import Counter
+
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# ----------------------------------------------------------------------------#
+# Per-request SQL instrumentation.
+# ----------------------------------------------------------------------------#
+
+
+class RequestStats:
+    """What the database did for one request."""
+
+    __slots__ = ("started", "statements", "db_time", "rows", "shapes")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.db_time = 0.0
+        self.rows = 0
+        # statement text -> executions; parameters are bound, so the same
+        # query issued for every row of a list shows up as one shape
+        self.shapes = Counter()
+
+    def merge(self, other):
+        """Add the statements of ``other``, e.g. those of a fan-out thread."""
+        self.statements += other.statements
+        self.db_time += other.db_time
+        self.rows += other.rows
+        self.shapes.update(other.shapes)
+
+    def repeated(self, threshold):
+        """Statement shapes run at least ``threshold`` times (likely N+1)."""
+        return [
+            (statement, count)
+            for statement, count in self.shapes.most_common()
+            if count >= threshold
+        ]
+
+
+def current_stats():
+    """
+    Stats of the current request, None outside one or when disabled. Fan-out
+    threads (fanout.py) record into their own, merged into the request's.
+    """
+    return g.get("sql_stats") if has_app_context() else None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_stats() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_stats()
+    if stats is None or not conn.info.get("query_started"):
+        return
+    stats.db_time += time.perf_counter() - conn.info["query_started"].pop()
+    stats.statements += 1
+    stats.shapes[statement] += 1
+    # drivers that buffer results (psycopg2) report SELECT row counts up
+    # front; sqlite3 reports -1 for them
+    if cursor.description is not None and cursor.rowcount > 0:
+        stats.rows += cursor.rowcount
+
+
+def _handle_error(context):
+    # the statement failed, after_cursor_execute will not run for it
+    started = context.connection.info.get("query_started")
+    if started:
+        started.pop()
+
+
+class Instrumentation:
+    """
+    Records statement count, DB time, rows and repeated statements for each
+    request through engine events. Adds a ``Server-Timing`` header and logs
+    requests slower than SLOW_REQUEST_MS, or with a statement repeated
+    N_PLUS_ONE_THRESHOLD times, as one JSON line.
+
+    The per-statement cost is two clock reads and a counter update; with
+    INSTRUMENTATION_ENABLED off no listener is installed at all.
+    """
+
+    def __init__(self, app=None):
+        self._listening = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions["instrumentation"] = self
+        if not app.config.get("INSTRUMENTATION_ENABLED", True):
+            return
+        if not self._listening:
+            # every engine; statements outside a request are ignored
+            event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+            event.listen(Engine, "handle_error", _handle_error)
+            self._listening = True
+        app.before_request(self._start)
+        app.after_request(self._finish)
+
+    @staticmethod
+    def _start():
+        g.sql_stats = RequestStats()
+
+    @staticmethod
+    def _finish(response):
+        stats = current_stats()
+        if stats is None:
+            return response
+        config = current_app.config
+        total = (time.perf_counter() - stats.started) * 1000
+        db_time = stats.db_time * 1000
+        if config.get("SERVER_TIMING_ENABLED", True):
+            response.headers.add(
+                "Server-Timing",
+                f'db;dur={db_time:.2f};desc="{stats.statements} statements", '
+                f"app;dur={total - db_time:.2f}, total;dur={total:.2f}",
+            )
+        repeated = stats.repeated(config.get("N_PLUS_ONE_THRESHOLD", 10))
+        if total >= config.get("SLOW_REQUEST_MS", 500) or repeated:
+            current_app.logger.warning(
+                json.dumps(
+                    {
+                        "event": "n_plus_one" if repeated else "slow_request",
+                        "method": request.method,
+                        "path": request.full_path.rstrip("?"),
+                        "endpoint": request.endpoint,
+                        "status": response.status_code,
+                        "duration_ms": round(total, 2),
+                        "db_ms": round(db_time, 2),
+                        "statements": stats.statements,
+                        "rows": stats.rows,
+                        "repeated": [
+                            {"statement": statement[:200], "count": count}
+                            for statement, count in repeated[:3]
+                        ],
+                    }
+                )
+            )
+        return response
+
+
+instrumentation = Instrumentation()
@@ -0,0 +1,41 @@
+from sqlalchemy.orm import joinedload, lazyload, noload, raiseload, selectinload
+
+
+# ----------------------------------------------------------------------------#
+# Loading strategies.
+# ----------------------------------------------------------------------------#
+# Relationships are lazy by default; every query that loads Venue/Artist
+# instances picks a named profile saying which relationships it needs and
+# how to load them. Relationships a profile marks "raise" must not be
+# touched by the route: accessing them raises instead of issuing a query.
+
+STRATEGIES = {
+    "joined": joinedload,
+    "selectin": selectinload,
+    "lazy": lazyload,
+    "none": noload,
+    "raise": raiseload,
+}
+
+PROFILES = {
+    # detail pages read genres; shows come from windowed queries
+    "detail": {"shows": "raise", "genres": "joined"},
+    # edit forms read and replace genres
+    "edit": {"shows": "raise", "genres": "joined"},
+    # deleting a venue cascades to its shows and unlinks its genres, the
+    # session needs both loaded to delete them; one statement each
+    "delete": {"shows": "selectin", "genres": "selectin"},
+}
+
+
+def load_options(model, profile):
+    options = []
+    for name, strategy in PROFILES[profile].items():
+        if hasattr(model, name):
+            options.append(STRATEGIES[strategy](getattr(model, name)))
+    return options
+
+
+def query_for(model, profile):
+    """``model.query`` with the loading strategies of ``profile``."""
+    return model.query.options(*load_options(model, profile))
@@ -0,0 +1,270 @@
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Response, before_render_template, g, request, template_rendered
+
+from cache import response_cache
+from instrumentation import current_stats
+from models import db
+
+
+# ----------------------------------------------------------------------------#
+# Prometheus metrics.
+# ----------------------------------------------------------------------------#
+# Kept in process and rendered in the Prometheus text format at /metrics, so
+# nothing beyond a scraper (or curl) is needed. Each worker process keeps its
+# own series; scrape every worker or aggregate in the scraper.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def header(self):
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._series[labelvalues] = self._series.get(labelvalues, 0) + amount
+
+    def render(self):
+        with self._lock:
+            series = sorted(self._series.items())
+        return self.header() + [
+            f"{self.name}{_labels(self.labelnames, values)} {value}"
+            for values, value in series
+        ]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labelvalues):
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                # per-bucket counts (last one is +Inf), sum
+                series = self._series[labelvalues] = [
+                    [0] * (len(self.buckets) + 1),
+                    0.0,
+                ]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def render(self):
+        with self._lock:
+            series = sorted(
+                (values, (list(counts), total))
+                for values, (counts, total) in self._series.items()
+            )
+        lines = self.header()
+        names = self.labelnames + ("le",)
+        for values, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{_labels(names, values + (bound,))} {cumulative}"
+                )
+            labels = _labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Collected(Metric):
+    """
+    Values read when scraped from ``collect()``, a list of (labelvalues,
+    value); a gauge unless ``kind`` says otherwise.
+    """
+
+    def __init__(self, name, documentation, collect, labelnames=(), kind="gauge"):
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+        self.kind = kind
+
+    def render(self):
+        return self.header() + [
+            f"{self.name}{_labels(self.labelnames, values)} {value}"
+            for values, value in self.collect()
+        ]
+
+
+# ----------------------------------------------------------------------------#
+# Collected values.
+# ----------------------------------------------------------------------------#
+
+
+def _pool_value(method):
+    # NullPool/StaticPool (e.g. SQLite files) have no size or overflow
+    def collect():
+        pool = db.engine.pool
+        value = getattr(pool, method, None)
+        return [((), value())] if callable(value) else []
+
+    return collect
+
+
+def _cache_hit_ratio():
+    stats = response_cache.stats()
+    lookups = stats["hits"] + stats["misses"]
+    return [((), stats["hits"] / lookups if lookups else 0)]
+
+
+def _cache_lookups():
+    stats = response_cache.stats()
+    return [(("hit",), stats["hits"]), (("miss",), stats["misses"])]
+
+
+class Metrics:
+    """Request, database, template, cache and pool metrics served at /metrics."""
+
+    def __init__(self, app=None):
+        self.requests = Counter(
+            "fyyur_http_requests_total",
+            "Requests by endpoint, method and status.",
+            ("endpoint", "method", "status"),
+        )
+        self.latency = Histogram(
+            "fyyur_http_request_duration_seconds",
+            "Request latency by endpoint.",
+            ("endpoint",),
+        )
+        self.db_time = Histogram(
+            "fyyur_db_duration_seconds",
+            "Time spent in SQL per request, by endpoint.",
+            ("endpoint",),
+        )
+        self.statements = Counter(
+            "fyyur_db_statements_total",
+            "SQL statements executed, by endpoint.",
+            ("endpoint",),
+        )
+        self.render_time = Histogram(
+            "fyyur_template_render_seconds",
+            "Template render time by template.",
+            ("template",),
+        )
+        self.registry = [
+            self.requests,
+            self.latency,
+            self.db_time,
+            self.statements,
+            self.render_time,
+            Collected(
+                "fyyur_response_cache_lookups_total",
+                "Rendered-page cache lookups, by result.",
+                _cache_lookups,
+                ("result",),
+                kind="counter",
+            ),
+            Collected(
+                "fyyur_response_cache_hit_ratio",
+                "Share of rendered-page cache lookups that hit.",
+                _cache_hit_ratio,
+            ),
+            Collected(
+                "fyyur_db_pool_size",
+                "Configured connection pool size.",
+                _pool_value("size"),
+            ),
+            Collected(
+                "fyyur_db_pool_checked_out",
+                "Connections currently checked out of the pool.",
+                _pool_value("checkedout"),
+            ),
+            Collected(
+                "fyyur_db_pool_checked_in",
+                "Idle connections in the pool.",
+                _pool_value("checkedin"),
+            ),
+            Collected(
+                "fyyur_db_pool_overflow",
+                "Connections open beyond the pool size (negative: unused slots).",
+                _pool_value("overflow"),
+            ),
+        ]
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions["metrics"] = self
+        if not app.config.get("METRICS_ENABLED", True):
+            return
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        before_render_template.connect(self._render_started, app)
+        template_rendered.connect(self._render_finished, app)
+        app.add_url_rule("/metrics", "metrics", self.view)
+
+    def render(self):
+        lines = []
+        for metric in self.registry:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def view(self):
+        return Response(self.render(), mimetype="text/plain; version=0.0.4")
+
+    @staticmethod
+    def _start():
+        g.metrics_started = time.perf_counter()
+
+    def _finish(self, response):
+        started = g.pop("metrics_started", None)
+        if started is None or request.endpoint == "metrics":
+            return response
+        # unmatched URLs share one label to keep the series count bounded
+        endpoint = request.endpoint or "none"
+        self.latency.observe(time.perf_counter() - started, endpoint)
+        self.requests.inc(endpoint, request.method, response.status_code)
+        stats = current_stats()
+        if stats is not None:
+            self.db_time.observe(stats.db_time, endpoint)
+            self.statements.inc(endpoint, amount=stats.statements)
+        return response
+
+    @staticmethod
+    def _render_started(sender, template, context, **extra):
+        g.setdefault("render_started", []).append(time.perf_counter())
+
+    def _render_finished(self, sender, template, context, **extra):
+        started = g.get("render_started")
+        if started:
+            self.render_time.observe(
+                time.perf_counter() - started.pop(), template.name or "string"
+            )
+
+
+metrics = Metrics()
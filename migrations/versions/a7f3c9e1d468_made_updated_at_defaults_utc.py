@@ -0,0 +1,32 @@
+"""Made updated_at defaults UTC
+
+Revision ID: a7f3c9e1d468
+Revises: d4a9b2c7e815
+Create Date: 2026-10-18 23:12:40.218337
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7f3c9e1d468'
+down_revision = 'd4a9b2c7e815'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # e1a9c5b7d302 used to backfill with now(), the session's local time,
+    # which is ahead of the application's utcnow() stamps east of UTC
+    for name in ('Venue', 'Artist', 'Show'):
+        op.alter_column(name, 'updated_at', server_default=sa.text("timezone('utc', now())"))
+        op.execute(
+            f'UPDATE "{name}" SET updated_at = timezone(\'utc\', now()) '
+            f"WHERE updated_at > timezone('utc', now())"
+        )
+
+
+def downgrade():
+    for name in ('Show', 'Artist', 'Venue'):
+        op.alter_column(name, 'updated_at', server_default=sa.func.now())
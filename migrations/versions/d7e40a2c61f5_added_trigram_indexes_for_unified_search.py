@@ -0,0 +1,32 @@
+"""Added trigram indexes for unified search
+
+Revision ID: d7e40a2c61f5
+Revises: c3d1f27a9b40
+Create Date: 2026-10-18 14:03:27.118904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7e40a2c61f5'
+down_revision = 'c3d1f27a9b40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_Venue_city_trgm', 'Venue', ['city'], unique=False, postgresql_using='gin', postgresql_ops={'city': 'gin_trgm_ops'})
+    op.create_index('ix_Venue_state_trgm', 'Venue', ['state'], unique=False, postgresql_using='gin', postgresql_ops={'state': 'gin_trgm_ops'})
+    op.create_index('ix_Artist_city_trgm', 'Artist', ['city'], unique=False, postgresql_using='gin', postgresql_ops={'city': 'gin_trgm_ops'})
+    op.create_index('ix_Artist_state_trgm', 'Artist', ['state'], unique=False, postgresql_using='gin', postgresql_ops={'state': 'gin_trgm_ops'})
+    op.create_index('ix_Genre_name_trgm', 'Genre', ['name'], unique=False, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+
+
+def downgrade():
+    op.drop_index('ix_Genre_name_trgm', table_name='Genre')
+    op.drop_index('ix_Artist_state_trgm', table_name='Artist')
+    op.drop_index('ix_Artist_city_trgm', table_name='Artist')
+    op.drop_index('ix_Venue_state_trgm', table_name='Venue')
+    op.drop_index('ix_Venue_city_trgm', table_name='Venue')
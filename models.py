@@ -12,17 +12,22 @@ artist_genre = db.Table(
     "artist_genre",
     db.Column("artist_id", db.Integer, db.ForeignKey("Artist.id"), primary_key=True),
     db.Column("genre_id", db.Integer, db.ForeignKey("Genre.id"), primary_key=True),
+    # the primary key serves lookups by artist; this one by genre (facets)
+    db.Index("ix_artist_genre_genre_id", "genre_id", "artist_id"),
 )
 
 venue_genre = db.Table(
     "venue_genre",
     db.Column("venue_id", db.Integer, db.ForeignKey("Venue.id"), primary_key=True),
     db.Column("genre_id", db.Integer, db.ForeignKey("Genre.id"), primary_key=True),
+    db.Index("ix_venue_genre_genre_id", "genre_id", "venue_id"),
 )
 
 
 class Venue(db.Model):
     __tablename__ = "Venue"
+    # area refreshes look venues up by city/state
+    __table_args__ = (db.Index("ix_Venue_state_city", "state", "city"),)
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String)
@@ -37,10 +42,21 @@ class Venue(db.Model):
     seeking_talent = db.Column(db.Boolean, default=False)
     seeking_description = db.Column(db.String(300))
     # genres = db.Column(db.String(120))
-    shows = db.relationship(
-        "Show", backref="venue", lazy=False, cascade="all, delete-orphan"
-    )
+    # loaded per query through loading.PROFILES, never eagerly by default
+    shows = db.relationship("Show", backref="venue", cascade="all, delete-orphan")
     genres = db.relationship("Genre", secondary=venue_genre)
+    # maintained by counters.py on every show write, see roll_forward
+    upcoming_shows_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+    next_show_time = db.Column(db.DateTime, index=True)
+    # bumped on every change, used to build ETag/Last-Modified validators
+    updated_at = db.Column(
+        db.DateTime,
+        nullable=False,
+        default=datetime.datetime.utcnow,
+        onupdate=datetime.datetime.utcnow,
+    )
 
     def to_dict(self):
         return {
@@ -76,6 +92,17 @@ class Artist(db.Model):
     seeking_description = db.Column(db.String(300))
     shows = db.relationship("Show", backref="artist")
     genres = db.relationship("Genre", secondary=artist_genre)
+    # maintained by counters.py on every show write, see roll_forward
+    upcoming_shows_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+    next_show_time = db.Column(db.DateTime, index=True)
+    updated_at = db.Column(
+        db.DateTime,
+        nullable=False,
+        default=datetime.datetime.utcnow,
+        onupdate=datetime.datetime.utcnow,
+    )
 
     def to_dict(self):
         return {
@@ -94,8 +121,25 @@ class Artist(db.Model):
 
 
 # TODO Implement Show and Artist models, and complete all model relationships and properties, as a database migration.
+# a show listed without an end books its venue and artist for this long
+SHOW_DURATION = datetime.timedelta(hours=3)
+# the longest booking accepted; overlap checks only look back this far
+MAX_SHOW_DURATION = datetime.timedelta(hours=24)
+
+
+def _default_end_time(context):
+    start_time = context.get_current_parameters().get("start_time")
+    return (start_time or datetime.datetime.utcnow()) + SHOW_DURATION
+
+
 class Show(db.Model):
     __tablename__ = "Show"
+    __table_args__ = (
+        # upcoming/past lookups per venue or artist, and time-range scans
+        db.Index("ix_Show_venue_id_start_time", "venue_id", "start_time"),
+        db.Index("ix_Show_artist_id_start_time", "artist_id", "start_time"),
+        db.Index("ix_Show_start_time", "start_time"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     artist_id = db.Column(db.Integer, db.ForeignKey("Artist.id"), nullable=False)
@@ -103,6 +147,31 @@ class Show(db.Model):
     start_time = db.Column(
         db.DateTime, nullable=False, default=datetime.datetime.utcnow
     )
+    # [start_time, end_time) of a venue or an artist never overlap; enforced
+    # on PostgreSQL by exclusion constraints (see the migration), checked by
+    # availability.conflicts elsewhere
+    end_time = db.Column(db.DateTime, nullable=False, default=_default_end_time)
+    updated_at = db.Column(
+        db.DateTime,
+        nullable=False,
+        default=datetime.datetime.utcnow,
+        onupdate=datetime.datetime.utcnow,
+    )
+
+
+class Area(db.Model):
+    """Venues of one city/state, maintained by areas.py for the venues page."""
+
+    __tablename__ = "Area"
+    __table_args__ = (db.UniqueConstraint("state", "city", name="uq_Area_state_city"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    city = db.Column(db.String(120))
+    state = db.Column(db.String(120))
+    venue_count = db.Column(db.Integer, nullable=False, default=0)
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0)
+    # JSON list of {"id", "name", "num_upcoming_shows"} ordered by venue id
+    venues = db.Column(db.Text, nullable=False, default="[]")
 
 
 class Genre(db.Model):
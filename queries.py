@@ -0,0 +1,399 @@
+import json
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import and_, case, exists, func, or_
+
+from genres import genre_cache
+from models import Area, Artist, Show, Venue, artist_genre, db, venue_genre
+
+
+# ----------------------------------------------------------------------------#
+# Shared read queries.
+# ----------------------------------------------------------------------------#
+
+
+def artist_ids_at_venue(venue_id):
+    """Artists with a show at the venue, i.e. whose pages mention it."""
+    rows = db.session.query(Show.artist_id).filter(Show.venue_id == venue_id)
+    return [artist_id for artist_id, in rows.distinct()]
+
+
+def venue_ids_of_artist(artist_id):
+    """Venues where the artist has a show, i.e. whose pages mention it."""
+    rows = db.session.query(Show.venue_id).filter(Show.artist_id == artist_id)
+    return [venue_id for venue_id, in rows.distinct()]
+
+
+def venue_areas(genre_id=None):
+    """
+    Venues grouped by city/state with their number of upcoming shows.
+
+    One ordered read of the Area summary maintained by areas.py; nothing is
+    grouped or counted per request. With ``genre_id`` only the venues of that
+    genre are kept, looked up on ix_venue_genre_genre_id, and areas left
+    without venues are dropped.
+    """
+    rows = db.session.query(Area.city, Area.state, Area.venues).order_by(
+        Area.state, Area.city
+    )
+    areas = [
+        {"city": city, "state": state, "venues": json.loads(venues)}
+        for city, state, venues in rows
+    ]
+    if genre_id is None:
+        return areas
+    tagged = db.session.query(venue_genre.c.venue_id).filter(
+        venue_genre.c.genre_id == genre_id
+    )
+    ids = {venue_id for venue_id, in tagged}
+    for area in areas:
+        area["venues"] = [venue for venue in area["venues"] if venue["id"] in ids]
+    return [area for area in areas if area["venues"]]
+
+
+def _when(upcoming: bool, now: datetime = None):
+    now = now or datetime.now()
+    return Show.start_time > now if upcoming else Show.start_time <= now
+
+
+def _seek(query, cursor, descending=False):
+    """Keyset filter + order on (start_time, id), continuing after ``cursor``."""
+    if cursor is not None:
+        start_time, show_id = cursor
+        if descending:
+            query = query.filter(
+                or_(
+                    Show.start_time < start_time,
+                    and_(Show.start_time == start_time, Show.id < show_id),
+                )
+            )
+        else:
+            query = query.filter(
+                or_(
+                    Show.start_time > start_time,
+                    and_(Show.start_time == start_time, Show.id > show_id),
+                )
+            )
+    if descending:
+        return query.order_by(Show.start_time.desc(), Show.id.desc())
+    return query.order_by(Show.start_time, Show.id)
+
+
+def window(query, limit: int):
+    """
+    First ``limit`` rows of a keyset query whose rows have ``start_time`` and
+    ``id``, plus the cursor of the next window (None when there is no more).
+    """
+    # fetch one extra row to know whether there is a next window
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].start_time, rows[-1].id)
+    return rows, next_cursor
+
+
+def show_counts(key_column, entity_id, now: datetime = None):
+    """(upcoming, past) show counts of one venue or artist, one statement."""
+    now = now or datetime.now()
+    upcoming, past = (
+        db.session.query(
+            func.sum(case([(Show.start_time > now, 1)], else_=0)),
+            func.sum(case([(Show.start_time <= now, 1)], else_=0)),
+        )
+        .filter(key_column == entity_id)
+        .one()
+    )
+    return upcoming or 0, past or 0
+
+
+def venue_shows(venue_id, upcoming: bool, now: datetime = None, cursor=None):
+    """
+    Upcoming (soonest first) or past (latest first) shows at a venue with the
+    artist columns its page needs, continuing after ``cursor``. Served by
+    ix_Show_venue_id_start_time; bound it with ``window``.
+    """
+    query = (
+        db.session.query(
+            Show.id,
+            Show.artist_id,
+            Show.start_time,
+            Artist.name.label("artist_name"),
+            Artist.image_link.label("artist_image_link"),
+        )
+        .join(Artist, Show.artist_id == Artist.id)
+        .filter(Show.venue_id == venue_id, _when(upcoming, now))
+    )
+    return _seek(query, cursor, descending=not upcoming)
+
+
+def artist_shows(artist_id, upcoming: bool, now: datetime = None, cursor=None):
+    """Same as venue_shows for an artist, served by ix_Show_artist_id_start_time."""
+    query = (
+        db.session.query(
+            Show.id,
+            Show.venue_id,
+            Show.start_time,
+            Venue.name.label("venue_name"),
+            Venue.image_link.label("venue_image_link"),
+        )
+        .join(Venue, Show.venue_id == Venue.id)
+        .filter(Show.artist_id == artist_id, _when(upcoming, now))
+    )
+    return _seek(query, cursor, descending=not upcoming)
+
+
+def entity_page(model, columns, after: int = None, limit: int = 30):
+    """
+    Column tuples ``(id, *columns)`` of ``model`` ordered by id, seeking past
+    the ``after`` id. No ORM instances are built. Returns the rows and the
+    cursor (last id) of the next page, None on the last page.
+    """
+    query = db.session.query(model.id, *[getattr(model, c) for c in columns])
+    if after is not None:
+        query = query.filter(model.id > after)
+    rows = query.order_by(model.id).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1][0]
+    return rows, next_cursor
+
+
+def entity_row(model, columns, entity_id: int):
+    return (
+        db.session.query(model.id, *[getattr(model, c) for c in columns])
+        .filter(model.id == entity_id)
+        .first()
+    )
+
+
+def genre_names(key_column, ids):
+    """
+    {id: [genre names]} for the given ids, in one statement on the
+    association table (``venue_genre.c.venue_id`` or
+    ``artist_genre.c.artist_id``); names come from the genre cache.
+    """
+    ids = list(ids)
+    names = {i: [] for i in ids}
+    if not ids:
+        return names
+    genre_id = key_column.table.c.genre_id
+    rows = db.session.query(key_column, genre_id).filter(key_column.in_(ids))
+    by_id = genre_cache.by_id
+    for entity_id, genre in rows.order_by(key_column, genre_id):
+        names[entity_id].append(by_id.get(genre))
+    return names
+
+
+def encode_cursor(start_time: datetime, show_id: int):
+    return f"{start_time.isoformat()}_{show_id}"
+
+
+def decode_cursor(cursor: str):
+    """Inverse of encode_cursor. Raises ValueError on a malformed cursor."""
+    start_time, _, show_id = cursor.rpartition("_")
+    return datetime.fromisoformat(start_time), int(show_id)
+
+
+def has_genre(key_column, entity_column, genre_id):
+    """
+    ``entity_column`` (a venue or artist id) is tagged with the genre, through
+    the association table of ``key_column`` (e.g. ``venue_genre.c.venue_id``).
+    """
+    return (
+        exists()
+        .where(key_column == entity_column)
+        .where(key_column.table.c.genre_id == genre_id)
+    )
+
+
+# /shows?when=... windows, from now to the end of the current day/week/month
+WHEN = ("today", "week", "month", "upcoming")
+
+
+def time_window(when, now: datetime = None):
+    """(since, until) of a WHEN window; until is None for "upcoming"."""
+    now = now or datetime.now()
+    today = datetime.combine(now.date(), datetime.min.time())
+    if when == "today":
+        return now, today + timedelta(days=1)
+    if when == "week":
+        return now, today + timedelta(days=7 - today.weekday())
+    if when == "month":
+        next_month = (today.replace(day=28) + timedelta(days=4)).replace(day=1)
+        return now, next_month
+    if when == "upcoming":
+        return now, None
+    raise ValueError(f"Unknown window: {when}")
+
+
+def show_filters(args, now: datetime = None):
+    """
+    shows_page filters from query-string ``args``: ?when= (see WHEN) or
+    ?from=&to= (ISO dates, both included), ?city=, ?state= and ?genre=.
+    Raises ValueError for malformed or unknown values.
+    """
+    filters = {}
+    if args.get("when"):
+        filters["since"], filters["until"] = time_window(args["when"], now)
+    if args.get("from"):
+        filters["since"] = datetime.combine(
+            date.fromisoformat(args["from"]), datetime.min.time()
+        )
+    if args.get("to"):
+        filters["until"] = datetime.combine(
+            date.fromisoformat(args["to"]) + timedelta(days=1), datetime.min.time()
+        )
+    for name in ("city", "state"):
+        if args.get(name):
+            filters[name] = args[name]
+    if args.get("genre"):
+        genre_id = genre_cache.by_name.get(args["genre"])
+        if genre_id is None:
+            raise ValueError(f"Unknown genre: {args['genre']}")
+        filters["genre_id"] = genre_id
+    return {name: value for name, value in filters.items() if value is not None}
+
+
+def shows_page(
+    after=None,
+    limit: int = 30,
+    since: datetime = None,
+    until: datetime = None,
+    city=None,
+    state=None,
+    genre_id=None,
+):
+    """
+    One page of shows ordered by (start_time, id) using keyset pagination.
+
+    ``after`` is the (start_time, id) of the last show of the previous page.
+    Venue and artist columns come from the same joined statement, so a page
+    costs one query no matter how many shows exist. Returns the rows and the
+    cursor of the next page (None on the last page).
+
+    Shows can be limited to start times in [since, until), a venue city and
+    state, and a genre of the venue or the artist. The time range narrows the
+    ix_Show_start_time scan the keyset already walks.
+    """
+    query = (
+        db.session.query(
+            Show.id,
+            Show.start_time,
+            Show.venue_id,
+            Venue.name.label("venue_name"),
+            Show.artist_id,
+            Artist.name.label("artist_name"),
+            Artist.image_link.label("artist_image_link"),
+        )
+        .join(Venue, Show.venue_id == Venue.id)
+        .join(Artist, Show.artist_id == Artist.id)
+    )
+    if since is not None:
+        query = query.filter(Show.start_time >= since)
+    if until is not None:
+        query = query.filter(Show.start_time < until)
+    if city is not None:
+        query = query.filter(Venue.city == city)
+    if state is not None:
+        query = query.filter(Venue.state == state)
+    if genre_id is not None:
+        query = query.filter(
+            or_(
+                has_genre(venue_genre.c.venue_id, Show.venue_id, genre_id),
+                has_genre(artist_genre.c.artist_id, Show.artist_id, genre_id),
+            )
+        )
+    return window(_seek(query, after), limit)
+
+
+# ----------------------------------------------------------------------------#
+# Versions for conditional GET.
+# ----------------------------------------------------------------------------#
+# Each function returns a row that changes whenever the page would change,
+# computed with one statement. The latest show start in the past is part of
+# it because a show moving from upcoming to past changes the page. Columns
+# named *updated_at are UTC and also give Last-Modified; show times are
+# local (compared with datetime.now()) and only go into the ETag.
+
+
+def _shows_version(now=None):
+    now = now or datetime.now()
+    return [
+        func.count(Show.id).label("shows"),
+        func.max(Show.updated_at).label("shows_updated_at"),
+        func.max(case([(Show.start_time <= now, Show.start_time)])).label("started"),
+    ]
+
+
+def _latest_start(key_column, entity_id, now):
+    # moves when one of the entity's shows starts, i.e. moves from upcoming
+    # to past; one seek of ix_Show_venue_id/artist_id_start_time
+    return (
+        db.session.query(Show.start_time)
+        .filter(key_column == entity_id, Show.start_time <= now)
+        .order_by(Show.start_time.desc())
+        .limit(1)
+        .as_scalar()
+        .label("started")
+    )
+
+
+def venue_version(venue_id, now: datetime = None):
+    """
+    The venue row's own ``updated_at`` (bumped by edits, by counters.py on
+    every show write and when a performing artist is renamed) plus the
+    latest show start: one primary-key read and one index seek, however
+    long the venue's show history.
+    """
+    now = now or datetime.now()
+    return (
+        db.session.query(
+            Venue.updated_at,
+            Venue.next_show_time,
+            _latest_start(Show.venue_id, venue_id, now),
+        )
+        .filter(Venue.id == venue_id)
+        .first()
+    )
+
+
+def artist_version(artist_id, now: datetime = None):
+    """As venue_version, for an artist page."""
+    now = now or datetime.now()
+    return (
+        db.session.query(
+            Artist.updated_at,
+            Artist.next_show_time,
+            _latest_start(Show.artist_id, artist_id, now),
+        )
+        .filter(Artist.id == artist_id)
+        .first()
+    )
+
+
+def _table_version(model):
+    name = model.__tablename__.lower()
+    return [
+        db.session.query(func.count(model.id)).as_scalar().label(f"{name}s"),
+        db.session.query(func.max(model.updated_at))
+        .as_scalar()
+        .label(f"{name}s_updated_at"),
+    ]
+
+
+def venues_version(now: datetime = None):
+    shows = db.session.query(*_shows_version(now=now)).subquery()
+    return db.session.query(*_table_version(Venue), *shows.c).one()
+
+
+def artists_version():
+    return db.session.query(*_table_version(Artist)).one()
+
+
+def shows_version(now: datetime = None):
+    shows = db.session.query(*_shows_version(now=now)).subquery()
+    return db.session.query(
+        *shows.c, *_table_version(Venue), *_table_version(Artist)
+    ).one()
@@ -0,0 +1,353 @@
+from abc import ABC, abstractmethod
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import case, func, literal, literal_column, or_, select, text, union_all
+from sqlalchemy.sql import column, table
+
+from models import Artist, Genre, Venue, artist_genre, db, venue_genre
+
+
+# ----------------------------------------------------------------------------#
+# Search backends.
+# ----------------------------------------------------------------------------#
+
+# text columns searched on Venue and Artist
+SEARCH_COLUMNS = ("name", "city", "state")
+
+# hit type -> (model, genre association table, association foreign key)
+ENTITIES = {
+    "venue": (Venue, venue_genre, "venue_id"),
+    "artist": (Artist, artist_genre, "artist_id"),
+}
+
+
+def _genre_member_ids(association, foreign_key, like):
+    # ids of the entities tagged with a genre whose name matches
+    return (
+        select([association.c[foreign_key]])
+        .select_from(association.join(Genre, Genre.id == association.c.genre_id))
+        .where(Genre.name.ilike(like))
+    )
+
+
+def _total():
+    # a window aggregate, so LIMIT does not affect it
+    return func.count().over().label("total")
+
+
+def _hit_columns(kind, model, tier, score):
+    return [
+        literal(kind).label("type"),
+        model.id.label("id"),
+        model.name.label("name"),
+        tier.label("tier"),
+        score.label("score"),
+    ]
+
+
+class SearchBackend(ABC):
+    """
+    Partial, case-insensitive search over Venue/Artist.
+
+    ``search`` returns ``(id, name, upcoming_shows_count, total)`` rows of
+    one model, best match first; ``total`` counts every match, not just the
+    ``limit`` returned.
+    ``search_all`` searches names, cities, states and genre names of every
+    entity type in one statement. Subclasses decide which index serves the
+    query by building the per-type ``hits`` selects.
+    """
+
+    def install(self, model):
+        """
+        Create whatever index the backend needs for ``model``. Schema
+        changes, run by ``flask search-index``, never from a request.
+        """
+
+    @abstractmethod
+    def search(self, model, term: str, limit: int = None):
+        """Rows of ``model`` whose name contains ``term``."""
+
+    @abstractmethod
+    def hits(self, kind: str, term: str):
+        """
+        Selects of ``(type, id, name, tier, score)`` for one hit type.
+        ``tier`` is 0 for a name match, 1 for city/state and 2 for genre;
+        ``score`` ranks hits inside a tier, higher first.
+        """
+
+    def search_all(self, term: str, limit: int = None):
+        selects = [s for kind in ENTITIES for s in self.hits(kind, term)]
+        hits = union_all(*selects).alias("hits")
+        # an entity can match in several ways, keep its best one
+        best = (
+            select(
+                [
+                    hits.c.type,
+                    hits.c.id,
+                    hits.c.name,
+                    func.min(hits.c.tier).label("tier"),
+                    func.max(hits.c.score).label("score"),
+                ]
+            )
+            .group_by(hits.c.type, hits.c.id, hits.c.name)
+            .alias("best")
+        )
+        # per-type totals are window aggregates, so LIMIT does not affect them
+        counts = [
+            func.sum(case([(best.c.type == kind, 1)], else_=0))
+            .over()
+            .label(f"{kind}_count")
+            for kind in ENTITIES
+        ]
+        query = select([best] + counts).order_by(
+            best.c.tier, best.c.score.desc(), best.c.name, best.c.id
+        )
+        if limit:
+            query = query.limit(limit)
+        rows = db.session.execute(query).fetchall()
+        type_counts = {
+            kind: int(rows[0][f"{kind}_count"]) if rows else 0 for kind in ENTITIES
+        }
+        return {
+            "count": sum(type_counts.values()),
+            "counts": type_counts,
+            "data": [
+                {"type": row.type, "id": row.id, "name": row.name, "tier": row.tier}
+                for row in rows
+            ],
+        }
+
+
+class LikeSearch(SearchBackend):
+    """Plain ILIKE scan. Works on every database, used as the fallback."""
+
+    def search(self, model, term, limit=None):
+        query = (
+            db.session.query(model.id, model.name, model.upcoming_shows_count, _total())
+            .filter(model.name.ilike(f"%{term}%"))
+            .order_by(model.name, model.id)
+        )
+        if limit:
+            query = query.limit(limit)
+        return query.all()
+
+    def score(self, model, term):
+        return literal(0.0)
+
+    def hits(self, kind, term):
+        model, association, foreign_key = ENTITIES[kind]
+        like = f"%{term}%"
+        tier = case(
+            [
+                (model.name.ilike(like), 0),
+                (or_(model.city.ilike(like), model.state.ilike(like)), 1),
+            ],
+            else_=2,
+        )
+        query = select(_hit_columns(kind, model, tier, self.score(model, term))).where(
+            or_(
+                *[getattr(model, name).ilike(like) for name in SEARCH_COLUMNS],
+                model.id.in_(_genre_member_ids(association, foreign_key, like)),
+            )
+        )
+        return [query]
+
+
+class TrigramSearch(LikeSearch):
+    """
+    PostgreSQL search served by pg_trgm GIN indexes.
+
+    The indexes are created by the ``c3d1f27a9b40`` and ``d7e40a2c61f5``
+    migrations; ILIKE '%term%' can use them directly and results are ranked
+    by trigram similarity.
+    """
+
+    def install(self, model):
+        name = model.__tablename__
+        db.session.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        for column_name in SEARCH_COLUMNS:
+            if hasattr(model, column_name):
+                db.session.execute(
+                    text(
+                        f'CREATE INDEX IF NOT EXISTS "ix_{name}_{column_name}_trgm" '
+                        f'ON "{name}" USING gin ({column_name} gin_trgm_ops)'
+                    )
+                )
+        db.session.commit()
+
+    def search(self, model, term, limit=None):
+        query = (
+            db.session.query(model.id, model.name, model.upcoming_shows_count, _total())
+            .filter(model.name.ilike(f"%{term}%"))
+            .order_by(self.score(model, term).desc(), model.id)
+        )
+        if limit:
+            query = query.limit(limit)
+        return query.all()
+
+    def score(self, model, term):
+        return func.similarity(model.name, term)
+
+
+class Fts5Search(SearchBackend):
+    """
+    SQLite search served by an external-content FTS5 table per model.
+
+    The trigram tokenizer gives the same substring semantics as ILIKE, and
+    triggers keep the FTS table in sync with the base table. Terms shorter
+    than a trigram cannot use the index and fall back to LIKE, as does any
+    term until ``flask search-index`` has installed it.
+    """
+
+    MIN_TERM_LENGTH = 3
+
+    def __init__(self):
+        self._installed = set()
+        self._fallback = LikeSearch()
+
+    def install(self, model):
+        # the base table may have been dropped and recreated since the last
+        # install (flask seed --reset), taking the triggers with it, so they
+        # are always recreated along with the index contents
+        name = model.__tablename__
+        fts = f"{name}_fts"
+        columns = ", ".join(SEARCH_COLUMNS)
+        new_values = ", ".join(f"new.{c}" for c in SEARCH_COLUMNS)
+        old_values = ", ".join(f"old.{c}" for c in SEARCH_COLUMNS)
+        existing = [
+            row[1] for row in db.session.execute(text(f'PRAGMA table_info("{fts}")'))
+        ]
+        statements = [
+            f'DROP TRIGGER IF EXISTS "{fts}_ai"',
+            f'DROP TRIGGER IF EXISTS "{fts}_ad"',
+            f'DROP TRIGGER IF EXISTS "{fts}_au"',
+        ]
+        if existing != list(SEARCH_COLUMNS):
+            statements += [
+                f'DROP TABLE IF EXISTS "{fts}"',
+                f'CREATE VIRTUAL TABLE "{fts}" USING fts5({columns}, '
+                f"content='{name}', content_rowid='id', tokenize='trigram')",
+            ]
+        statements += [
+            f'CREATE TRIGGER "{fts}_ai" AFTER INSERT ON "{name}" BEGIN '
+            f'INSERT INTO "{fts}"(rowid, {columns}) VALUES (new.id, {new_values}); '
+            f"END",
+            f'CREATE TRIGGER "{fts}_ad" AFTER DELETE ON "{name}" BEGIN '
+            f'INSERT INTO "{fts}"("{fts}", rowid, {columns}) '
+            f"VALUES ('delete', old.id, {old_values}); END",
+            f'CREATE TRIGGER "{fts}_au" AFTER UPDATE OF {columns} ON "{name}" BEGIN '
+            f'INSERT INTO "{fts}"("{fts}", rowid, {columns}) '
+            f"VALUES ('delete', old.id, {old_values}); "
+            f'INSERT INTO "{fts}"(rowid, {columns}) VALUES (new.id, {new_values}); '
+            f"END",
+            f'INSERT INTO "{fts}"("{fts}") VALUES (\'rebuild\')',
+        ]
+        for statement in statements:
+            db.session.execute(text(statement))
+        db.session.commit()
+        self._installed.add(name)
+
+    def installed(self, model):
+        """Whether the FTS table of ``model`` and all its triggers exist."""
+        name = model.__tablename__
+        if name not in self._installed:
+            fts = f"{name}_fts"
+            found = db.session.execute(
+                text(
+                    "SELECT count(*) FROM sqlite_master WHERE name IN "
+                    "(:table, :ai, :ad, :au)"
+                ),
+                {"table": fts, "ai": f"{fts}_ai", "ad": f"{fts}_ad", "au": f"{fts}_au"},
+            ).scalar()
+            if found < 4:
+                return False
+            self._installed.add(name)
+        return True
+
+    def _match(self, model, term, column_name=None):
+        # a quoted phrase is matched as a substring by the trigram tokenizer
+        fts = table(f"{model.__tablename__}_fts", column("rowid"), column("rank"))
+        phrase = '"' + term.replace('"', '""') + '"'
+        if column_name:
+            phrase = f"{column_name} : {phrase}"
+        return fts, literal_column(f'"{fts.name}"').op("MATCH")(phrase)
+
+    def search(self, model, term, limit=None):
+        # without its index (see install) a term is scanned instead
+        if len(term) < self.MIN_TERM_LENGTH or not self.installed(model):
+            return self._fallback.search(model, term, limit)
+        fts, match = self._match(model, term, "name")
+        base = model.__table__
+        query = (
+            select([base.c.id, base.c.name, base.c.upcoming_shows_count, _total()])
+            .select_from(base.join(fts, fts.c.rowid == base.c.id))
+            .where(match)
+            .order_by(fts.c.rank, base.c.id)
+        )
+        if limit:
+            query = query.limit(limit)
+        return db.session.execute(query).fetchall()
+
+    def hits(self, kind, term):
+        model, association, foreign_key = ENTITIES[kind]
+        if len(term) < self.MIN_TERM_LENGTH or not self.installed(model):
+            return self._fallback.hits(kind, term)
+        fts, match = self._match(model, term)
+        like = f"%{term}%"
+        text_hits = (
+            select(
+                _hit_columns(
+                    kind,
+                    model,
+                    case([(model.name.ilike(like), 0)], else_=1),
+                    # bm25 rank is negative, closer to zero is worse
+                    -fts.c.rank,
+                )
+            )
+            .select_from(model.__table__.join(fts, fts.c.rowid == model.id))
+            .where(match)
+        )
+        genre_hits = select(_hit_columns(kind, model, literal(2), literal(0.0))).where(
+            model.id.in_(_genre_member_ids(association, foreign_key, like))
+        )
+        return [text_hits, genre_hits]
+
+
+BACKENDS = {
+    "like": LikeSearch,
+    "postgresql": TrigramSearch,
+    "sqlite": Fts5Search,
+}
+
+_backends = {}
+
+
+def get_search_backend():
+    """
+    Backend for the current database, chosen by dialect unless the
+    SEARCH_BACKEND setting forces one. Instances are kept per engine.
+    """
+    engine = db.engine
+    name = current_app.config.get("SEARCH_BACKEND") or engine.dialect.name
+    key = (str(engine.url), name)
+    if key not in _backends:
+        _backends[key] = BACKENDS.get(name, LikeSearch)()
+    return _backends[key]
+
+
+def install_search_indexes():
+    """Install the current backend's indexes of venues and artists."""
+    backend = get_search_backend()
+    for model in (Venue, Artist):
+        backend.install(model)
+    return backend
+
+
+@click.command("search-index")
+@with_appcontext
+def search_index_command():
+    """Create or repair the search indexes of venues and artists."""
+    backend = install_search_indexes()
+    click.echo(f"Search indexes installed ({type(backend).__name__}).")
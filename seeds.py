@@ -1,7 +1,11 @@
 from datetime import datetime
 from os import name
 
-from models import Artist, Genre
+import click
+from flask.cli import with_appcontext
+
+from models import Artist, Genre, Show, Venue, db
+from search import install_search_indexes
 
 
 data1 = {
@@ -205,3 +209,19 @@ def seed_data(db, Venue, Artist, Show):
     except Exception as e:
         db.session.rollback()
         print(f"Error en el seed: {e}")
+
+
+@click.command("seed")
+@click.option(
+    "--reset", is_flag=True, help="Drop and recreate every table first (destructive)."
+)
+@with_appcontext
+def seed_command(reset):
+    """Load the sample genres, venues, artists and shows."""
+    if reset:
+        db.drop_all()
+        db.create_all()
+    seed_data(db, Venue, Artist, Show)
+    if reset:
+        # dropping the tables also dropped the search triggers
+        install_search_indexes()
@@ -0,0 +1,114 @@
+import os
+import re
+import sys
+import warnings
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from availability import availability_index  # noqa: E402
+from models import Artist, Genre, Show, Venue, db  # noqa: E402
+
+# flask_wtf.Form deprecation, raised on every form instantiation
+warnings.filterwarnings("ignore", message='"flask_wtf.Form" has been renamed')
+
+CITIES = [("San Francisco", "CA"), ("New York", "NY"), ("Austin", "TX")]
+
+
+def populate(size, now=None):
+    """
+    ``size`` venues and artists spread over CITIES, two genres each, and
+    four shows per venue (two past, two upcoming) with different artists.
+    """
+    now = now or datetime.now()
+    genres = [Genre(name=name) for name in ("Jazz", "Blues", "Folk", "Rock n Roll")]
+    db.session.add_all(genres)
+    venues, artists = [], []
+    for i in range(size):
+        city, state = CITIES[i % len(CITIES)]
+        tags = [genres[i % len(genres)], genres[(i + 1) % len(genres)]]
+        venues.append(Venue(name=f"Venue {i}", city=city, state=state, genres=tags))
+        artists.append(Artist(name=f"Artist {i}", city=city, state=state, genres=tags))
+    db.session.add_all(venues + artists)
+    db.session.flush()
+    for i, venue in enumerate(venues):
+        for k, days in enumerate((-30, -10, 10, 30)):
+            artist = artists[(i + k) % size]
+            start_time = now + timedelta(days=days, hours=i)
+            db.session.add(Show(venue=venue, artist=artist, start_time=start_time))
+    db.session.commit()
+
+
+def _enforce_foreign_keys(connection, record):
+    # as PostgreSQL always does
+    connection.execute("PRAGMA foreign_keys=ON")
+
+
+def make_app(size, **config):
+    """
+    An app on a fresh in-memory database holding populate(size), with
+    foreign keys enforced. ``config`` overrides the test settings, e.g. the
+    SQLALCHEMY_DATABASE_URI of a scratch database to recreate.
+    """
+    app = create_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": "sqlite://",
+            "TESTING": True,
+            "WTF_CSRF_ENABLED": False,
+            "RESPONSE_CACHE_BACKEND": "none",
+            "DETAIL_FANOUT_WORKERS": 0,
+            "INSTRUMENTATION_ENABLED": True,
+            "SERVER_TIMING_ENABLED": True,
+            "SLOW_REQUEST_MS": float("inf"),
+            **config,
+        }
+    )
+    with app.app_context():
+        if db.engine.dialect.name == "sqlite":
+            event.listen(db.engine, "connect", _enforce_foreign_keys)
+        # other databases may hold the tables of an earlier run
+        db.drop_all()
+        db.create_all()
+        populate(size)
+        db.session.remove()
+    # process-wide, it may still hold the calendar of a previous app
+    availability_index.invalidate()
+    return app
+
+
+@pytest.fixture
+def app():
+    app = make_app(6)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def statements(response):
+    """Statements run for ``response``, from the instrumentation's Server-Timing."""
+    match = re.search(r'desc="(\d+) statements"', response.headers["Server-Timing"])
+    return int(match.group(1))
+
+
+@pytest.fixture
+def hydrated():
+    """Counter of the ORM instances loaded, per model name."""
+    loaded = Counter()
+
+    def count(target, context):
+        loaded[type(target).__name__] += 1
+
+    event.listen(db.Model, "load", count, propagate=True)
+    yield loaded
+    event.remove(db.Model, "load", count)
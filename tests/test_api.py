@@ -0,0 +1,61 @@
+import pytest
+
+from models import Show, db
+
+
+def get(client, url, status=200, **params):
+    response = client.get(url, query_string=params)
+    assert response.status_code == status, response.get_data(as_text=True)
+    return response.get_json()
+
+
+def test_entity_lists_page_by_id_with_the_requested_fields(client):
+    first = get(client, "/api/v1/venues", limit=4)
+    assert [venue["id"] for venue in first["data"]] == [1, 2, 3, 4]
+    assert set(first["data"][0]) == {"id", "name", "city", "state"}
+    rest = get(client, "/api/v1/venues", limit=4, after=first["next"])
+    assert [venue["id"] for venue in rest["data"]] == [5, 6]
+    assert rest["next"] is None
+    page = get(client, "/api/v1/artists", fields="id,genres,num_upcoming_shows")
+    assert page["data"][0] == {
+        "id": 1,
+        "genres": ["Jazz", "Blues"],
+        "num_upcoming_shows": 2,
+    }
+
+
+def test_entity_detail(client, app):
+    venue = get(client, "/api/v1/venues/1")
+    with app.app_context():
+        # two past shows, then the upcoming ones
+        starts = db.session.query(Show.start_time).filter(Show.venue_id == 1)
+        next_start = starts.order_by(Show.start_time).all()[2][0]
+    assert venue["next_show_time"] == next_start.isoformat()
+    assert venue["genres"] == ["Jazz", "Blues"]
+    assert get(client, "/api/v1/artists/2", fields="name") == {"name": "Artist 1"}
+
+
+def test_shows_follow_the_cursor(client):
+    seen, after = [], None
+    while True:
+        params = {"limit": 5, **({"after": after} if after else {})}
+        page = get(client, "/api/v1/shows", **params)
+        seen += [show["id"] for show in page["data"]]
+        after = page["next"]
+        if after is None:
+            break
+    assert sorted(seen) == list(range(1, 25))
+
+
+@pytest.mark.parametrize(
+    "url,params,status",
+    [
+        ("/api/v1/venues/99", {}, 404),
+        ("/api/v1/venues", {"fields": "id,password"}, 400),
+        ("/api/v1/venues", {"after": "x"}, 400),
+        ("/api/v1/shows", {"after": "not-a-cursor"}, 400),
+        ("/api/v1/search", {}, 400),
+    ],
+)
+def test_bad_requests_get_json_errors(client, url, params, status):
+    assert "error" in get(client, url, status, **params)
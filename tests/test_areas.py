@@ -0,0 +1,75 @@
+import json
+from datetime import datetime, timedelta
+
+from areas import refresh_areas
+from counters import roll_forward
+from models import Area, Show, Venue, db
+
+
+def areas():
+    return {
+        (area.city, area.state): (
+            area.venue_count,
+            area.upcoming_shows_count,
+            json.loads(area.venues),
+        )
+        for area in Area.query
+    }
+
+
+def assert_matches_a_full_rebuild():
+    kept = areas()
+    refresh_areas(db.session)
+    assert kept == areas()
+    db.session.rollback()
+
+
+def test_area_rows_list_their_venues(app):
+    with app.app_context():
+        assert areas()[("San Francisco", "CA")] == (
+            2,
+            4,
+            [
+                {"id": 1, "name": "Venue 0", "num_upcoming_shows": 2},
+                {"id": 4, "name": "Venue 3", "num_upcoming_shows": 2},
+            ],
+        )
+        assert_matches_a_full_rebuild()
+
+
+def test_creating_moving_and_renaming_venues(app):
+    with app.app_context():
+        db.session.add(Venue(name="Boise Hall", city="Boise", state="ID"))
+        venue = Venue.query.get(1)
+        venue.city, venue.state = "Austin", "TX"
+        Venue.query.get(4).name = "Renamed"
+        db.session.commit()
+        rows = areas()
+        assert rows[("Boise", "ID")][:2] == (1, 0)
+        assert [v["name"] for v in rows[("San Francisco", "CA")][2]] == ["Renamed"]
+        assert [v["id"] for v in rows[("Austin", "TX")][2]] == [1, 3, 6]
+        assert_matches_a_full_rebuild()
+
+
+def test_deleting_the_last_venue_drops_its_area(app):
+    with app.app_context():
+        for venue_id in (1, 4):
+            db.session.delete(Venue.query.get(venue_id))
+        db.session.commit()
+        assert ("San Francisco", "CA") not in areas()
+        assert_matches_a_full_rebuild()
+
+
+def test_show_writes_and_roll_forward_update_the_counts(app):
+    with app.app_context():
+        start = datetime.now() + timedelta(days=1)
+        db.session.add(Show(venue_id=1, artist_id=1, start_time=start))
+        db.session.commit()
+        assert areas()[("San Francisco", "CA")][1] == 5
+        assert_matches_a_full_rebuild()
+        roll_forward(now=datetime.now() + timedelta(days=20))
+        assert areas()[("San Francisco", "CA")][2] == [
+            {"id": 1, "name": "Venue 0", "num_upcoming_shows": 1},
+            {"id": 4, "name": "Venue 3", "num_upcoming_shows": 1},
+        ]
+        assert_matches_a_full_rebuild()
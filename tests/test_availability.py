@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+
+from availability import Calendar, availability_index, conflict_errors
+from models import Show, db
+
+START = datetime(2030, 1, 1, 20)
+HOUR = timedelta(hours=1)
+
+
+def book(client, venue_id, artist_id, start):
+    return client.post(
+        "/shows/create",
+        data={
+            "venue_id": venue_id,
+            "artist_id": artist_id,
+            "start_time": start.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+    )
+
+
+def booked_starts(app):
+    with app.app_context():
+        rows = db.session.query(Show.start_time).filter(Show.start_time >= START)
+        return sorted(start for start, in rows)
+
+
+def test_calendar_overlaps_but_adjacent_bookings_do_not():
+    calendar = Calendar()
+    calendar.add(1, START, START + 3 * HOUR)
+    assert calendar.busy(1, START + HOUR, START + 2 * HOUR)
+    assert calendar.busy(1, START - HOUR, START + timedelta(minutes=1))
+    # end == start on either side
+    assert not calendar.busy(1, START + 3 * HOUR, START + 5 * HOUR)
+    assert not calendar.busy(1, START - 2 * HOUR, START)
+    assert not calendar.busy(2, START, START + 3 * HOUR)
+
+
+def test_calendar_remove_recomputes_the_latest_end():
+    calendar = Calendar()
+    calendar.add(1, START, START + 20 * HOUR)
+    calendar.add(1, START + HOUR, START + 2 * HOUR)
+    assert calendar.busy(1, START + 10 * HOUR, START + 11 * HOUR)
+    calendar.remove(1, START, START + 20 * HOUR)
+    assert not calendar.busy(1, START + 10 * HOUR, START + 11 * HOUR)
+    assert calendar.busy(1, START + HOUR, START + 90 * timedelta(minutes=1))
+
+
+def test_booking_rejects_overlaps_and_accepts_adjacent_shows(app, client):
+    book(client, 1, 1, START)
+    # the venue, then the artist, is taken
+    book(client, 1, 2, START + HOUR)
+    book(client, 2, 1, START + 2 * HOUR)
+    book(client, 1, 2, START + 3 * HOUR)
+    assert booked_starts(app) == [START, START + 3 * HOUR]
+
+
+def test_editing_a_show_only_conflicts_with_other_shows(app):
+    with app.app_context():
+        show = Show(venue_id=1, artist_id=1, start_time=START)
+        other = Show(venue_id=1, artist_id=2, start_time=START + 3 * HOUR)
+        db.session.add_all([show, other])
+        db.session.commit()
+        moved = START - HOUR, START + 2 * HOUR
+        assert conflict_errors(1, 1, *moved, exclude=show.id) is None
+        assert conflict_errors(1, 1, *moved) is not None
+        later = START + HOUR, START + 4 * HOUR
+        assert conflict_errors(1, 1, *later, exclude=show.id) == {
+            "start_time": [
+                f"Venue is already booked for show {other.id} at {other.start_time}"
+            ]
+        }
+
+
+def test_committed_shows_move_the_index_without_reloading(app, client, monkeypatch):
+    def available():
+        response = client.get(
+            "/api/v1/venues/available",
+            query_string={"city": "San Francisco", "state": "CA", "start": START},
+        )
+        return [venue["id"] for venue in response.get_json()["data"]]
+
+    assert available() == [1, 4]
+    monkeypatch.setattr(availability_index, "load", None)
+    book(client, 1, 1, START)
+    assert available() == [4]
+    with app.app_context():
+        show = Show.query.filter_by(start_time=START).one()
+        show.venue_id = 4
+        db.session.commit()
+        assert available() == [1]
+        db.session.delete(show)
+        db.session.commit()
+    assert available() == [1, 4]
@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta
+
+from conftest import make_app
+from models import Venue, db
+
+
+def test_cached_page_is_not_reused_once_its_version_moves():
+    app = make_app(3, RESPONSE_CACHE_BACKEND="memory")
+    client = app.test_client()
+    first = client.get("/venues/1")
+    assert first.headers["X-Cache"] == "MISS"
+    assert client.get("/venues/1").headers["X-Cache"] == "HIT"
+
+    # a write this process's cache never heard of, as from another worker
+    with app.app_context():
+        updated_at = datetime.utcnow() + timedelta(minutes=1)
+        db.session.execute(Venue.__table__.update().values(updated_at=updated_at))
+        db.session.commit()
+
+    stale = client.get("/venues/1", headers={"If-None-Match": first.headers["ETag"]})
+    assert stale.status_code == 200
+    assert stale.headers["X-Cache"] == "MISS"
+    assert stale.headers["ETag"] != first.headers["ETag"]
+    fresh = client.get("/venues/1")
+    assert fresh.headers["X-Cache"] == "HIT"
+    assert fresh.headers["ETag"] == stale.headers["ETag"]
+
+
+def test_each_app_keeps_its_own_cache_backend():
+    cached = make_app(3, RESPONSE_CACHE_BACKEND="memory").test_client()
+    uncached = make_app(3, RESPONSE_CACHE_BACKEND="none").test_client()
+    cached.get("/venues/1")
+    assert cached.get("/venues/1").headers["X-Cache"] == "HIT"
+    assert "X-Cache" not in uncached.get("/venues/1").headers
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+
+from counters import roll_forward
+from models import Artist, Show, Venue, db
+
+
+def counters(model, entity_id):
+    row = db.session.query(model.upcoming_shows_count, model.next_show_time)
+    return tuple(row.filter(model.id == entity_id).one())
+
+
+def upcoming(column, entity_id, now):
+    """(count, first start) of the upcoming shows, counted from Show."""
+    starts = sorted(
+        start
+        for start, in db.session.query(Show.start_time).filter(
+            column == entity_id, Show.start_time > now
+        )
+    )
+    return len(starts), starts[0] if starts else None
+
+
+def test_creating_a_show_counts_it(app):
+    with app.app_context():
+        count, _ = counters(Venue, 1)
+        artist_count, _ = counters(Artist, 1)
+        start = datetime.now() + timedelta(days=1)
+        db.session.add(Show(venue_id=1, artist_id=1, start_time=start))
+        db.session.commit()
+        assert counters(Venue, 1) == (count + 1, start)
+        assert counters(Artist, 1) == (artist_count + 1, start)
+
+
+def test_moving_a_show_recounts_both_venues(app):
+    with app.app_context():
+        show = Show.query.filter_by(venue_id=1).order_by(Show.start_time.desc()).first()
+        show.venue_id = 2
+        db.session.commit()
+        now = datetime.now()
+        assert counters(Venue, 1) == upcoming(Show.venue_id, 1, now)
+        assert counters(Venue, 2) == upcoming(Show.venue_id, 2, now)
+        assert (counters(Venue, 1)[0], counters(Venue, 2)[0]) == (1, 3)
+
+
+def test_editing_a_show_into_the_past_moves_next_show_time(app):
+    with app.app_context():
+        _, next_show_time = counters(Venue, 1)
+        show = Show.query.filter_by(venue_id=1, start_time=next_show_time).one()
+        artist_id = show.artist_id
+        show.start_time -= timedelta(days=100)
+        db.session.commit()
+        now = datetime.now()
+        assert counters(Venue, 1) == upcoming(Show.venue_id, 1, now)
+        assert counters(Venue, 1)[1] > next_show_time
+        assert counters(Artist, artist_id) == upcoming(Show.artist_id, artist_id, now)
+
+
+def test_deleting_shows_and_venues_recounts_their_artists(app):
+    with app.app_context():
+        artist_ids = {show.artist_id for show in Venue.query.get(1).shows}
+        db.session.delete(Venue.query.get(1))
+        db.session.commit()
+        now = datetime.now()
+        for artist_id in artist_ids:
+            assert counters(Artist, artist_id) == upcoming(
+                Show.artist_id, artist_id, now
+            )
+
+
+def test_roll_forward_recounts_started_shows(app):
+    with app.app_context():
+        later = datetime.now() + timedelta(days=20)
+        stale = counters(Venue, 1)
+        roll_forward(now=later)
+        assert counters(Venue, 1) != stale
+        for model, column in ((Venue, Show.venue_id), (Artist, Show.artist_id)):
+            for (entity_id,) in db.session.query(model.id):
+                assert counters(model, entity_id) == upcoming(column, entity_id, later)
@@ -0,0 +1,70 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+import export as export_module
+from export import export, export_command
+from importer import GENRE_SEPARATOR
+
+
+def jsonl(response):
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_shows_export_in_start_order(client):
+    shows = jsonl(client.get("/api/v1/export/shows"))
+    assert len(shows) == 24
+    starts = [show["start_time"] for show in shows]
+    assert starts == sorted(starts)
+    assert set(shows[0]) == set(export_module.SHOW_FIELDS)
+
+
+def test_venues_export_as_csv_with_genres(client):
+    response = client.get("/api/v1/export/venues", query_string={"format": "csv"})
+    assert response.mimetype == "text/csv"
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [row["id"] for row in rows] == ["1", "2", "3", "4", "5", "6"]
+    assert rows[0]["genres"] == GENRE_SEPARATOR.join(["Jazz", "Blues"])
+
+
+def test_export_filters(client):
+    url = "/api/v1/export/"
+    shows = jsonl(client.get(url + "shows?venue_id=2"))
+    assert {show["venue_id"] for show in shows} == {2}
+    # artists that played venue 1, see conftest.populate
+    artists = jsonl(client.get(url + "artists?venue_id=1"))
+    assert [artist["id"] for artist in artists] == [1, 2, 3, 4]
+    venues = jsonl(client.get(url + "venues?genre=Folk"))
+    assert venues and all("Folk" in venue["genres"] for venue in venues)
+    since = datetime.now().replace(microsecond=0).isoformat()
+    upcoming = jsonl(client.get(url + "shows", query_string={"since": since}))
+    assert len(upcoming) == 12
+
+
+def test_bad_export_requests(client):
+    assert client.get("/api/v1/export/genres").status_code == 404
+    assert client.get("/api/v1/export/shows?format=xml").status_code == 400
+    assert client.get("/api/v1/export/shows?genre=Polka").status_code == 400
+    assert client.get("/api/v1/export/shows?since=yesterday").status_code == 400
+
+
+def test_export_streams_chunks(app, monkeypatch):
+    monkeypatch.setattr(export_module, "CHUNK", 5)
+    with app.app_context():
+        chunks = list(export("shows", "jsonl"))
+    assert [chunk.count("\n") for chunk in chunks] == [5, 5, 5, 5, 4]
+
+
+def test_export_command_picks_the_format_from_the_extension(app, tmp_path):
+    path = tmp_path / "artists.csv"
+    until = (datetime.now() + timedelta(days=400)).strftime("%Y-%m-%d")
+    result = app.test_cli_runner().invoke(
+        export_command, ["artists", str(path), "--until", until]
+    )
+    assert result.exit_code == 0, result.output
+    rows = list(csv.DictReader(path.open(encoding="utf-8")))
+    assert len(rows) == 6
+    result = app.test_cli_runner().invoke(export_command, ["shows", "--genre", "Polka"])
+    assert result.exit_code != 0
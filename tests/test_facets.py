@@ -0,0 +1,54 @@
+from facets import facet_counts
+from genres import genre_cache
+from models import Venue, db
+
+# see conftest.populate: venue i is tagged with genres i and i + 1 (mod 4)
+VENUE_FACETS = [("Blues", 4), ("Folk", 3), ("Jazz", 3), ("Rock n Roll", 2)]
+
+
+def test_counts_are_cached_most_used_first(app, monkeypatch):
+    with app.app_context():
+        assert facet_counts.counts("venues") == VENUE_FACETS
+        assert facet_counts.counts("artists") == VENUE_FACETS
+        monkeypatch.setattr(facet_counts, "load", None)
+        assert facet_counts.counts("venues") == VENUE_FACETS
+
+
+def test_retagging_a_venue_moves_the_counts_once_committed(app):
+    with app.app_context():
+        facet_counts.counts("venues")
+        venue = Venue.query.get(1)
+        venue.genres = genre_cache.resolve(["Rock n Roll"])
+        db.session.flush()
+        db.session.rollback()
+        assert facet_counts.counts("venues") == VENUE_FACETS
+        venue = Venue.query.get(1)
+        venue.genres = genre_cache.resolve(["Rock n Roll"])
+        db.session.commit()
+        assert facet_counts.counts("venues") == [
+            ("Blues", 3),
+            ("Folk", 3),
+            ("Rock n Roll", 3),
+            ("Jazz", 2),
+        ]
+
+
+def test_genre_facet_narrows_the_listing(app, client):
+    response = client.get("/venues?genre=Rock n Roll")
+    assert response.status_code == 200
+    page = response.get_data(as_text=True)
+    assert "Venue 2" in page and "Venue 3" in page
+    assert "Venue 0" not in page
+    assert "<strong>Rock n Roll (2)</strong>" in page
+    etag = response.headers["ETag"]
+    with app.app_context():
+        Venue.query.get(1).genres = genre_cache.resolve(["Rock n Roll"])
+        db.session.commit()
+    response = client.get("/venues?genre=Rock n Roll")
+    assert response.headers["ETag"] != etag
+    assert "Venue 0" in response.get_data(as_text=True)
+
+
+def test_unknown_genres_are_bad_requests(client):
+    assert client.get("/venues?genre=Polka").status_code == 400
+    assert client.get("/artists?genre=Polka").status_code == 400
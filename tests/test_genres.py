@@ -0,0 +1,43 @@
+from sqlalchemy import event
+
+from genres import genre_cache
+from models import Genre, db
+
+
+def test_genre_writes_invalidate_the_catalog(app):
+    with app.app_context():
+        assert "Soul" not in genre_cache.by_name
+        db.session.add(Genre(name="Soul"))
+        db.session.commit()
+        soul = genre_cache.by_name["Soul"]
+        Genre.query.get(soul).name = "Funk"
+        db.session.commit()
+        assert genre_cache.by_id[soul] == "Funk"
+        assert "Soul" not in genre_cache.by_name
+        db.session.delete(Genre.query.get(soul))
+        db.session.commit()
+        assert soul not in genre_cache.by_id
+
+
+def test_rolled_back_genres_do_not_stay_cached(app):
+    with app.app_context():
+        db.session.add(Genre(name="Soul"))
+        db.session.flush()
+        # loaded while the insert is still uncommitted
+        assert "Soul" in genre_cache.by_name
+        db.session.rollback()
+        assert "Soul" not in genre_cache.by_name
+
+
+def test_resolve_skips_unknown_names_without_querying(app):
+    with app.app_context():
+        genre_cache.load()
+        queries = []
+        event.listen(db.engine, "before_cursor_execute", lambda *a: queries.append(a))
+        genres = genre_cache.resolve(["Jazz", "Polka", "Folk"])
+        assert [genre.name for genre in genres] == ["Jazz", "Folk"]
+        assert [genre.id for genre in genres] == [
+            genre_cache.by_name["Jazz"],
+            genre_cache.by_name["Folk"],
+        ]
+        assert queries == []
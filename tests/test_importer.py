@@ -0,0 +1,101 @@
+import json
+
+from importer import ExecutemanyWriter, Importer, import_command, read_rows
+from models import Area, Show, Venue, db
+
+
+def venue(name, city="Austin", state="TX", **fields):
+    return {
+        "name": name,
+        "city": city,
+        "state": state,
+        "address": "1 Main St",
+        "phone": "512-555-0100",
+        "genres": ["Jazz"],
+        "facebook_link": "https://www.facebook.com/venue",
+        **fields,
+    }
+
+
+def jsonl(*records):
+    return "".join(
+        (record if isinstance(record, str) else json.dumps(record)) + "\n"
+        for record in records
+    )
+
+
+def test_import_accepts_valid_rows_and_reports_rejects(app, tmp_path):
+    path = tmp_path / "venues.jsonl"
+    path.write_text(
+        jsonl(
+            venue("New Hall"),
+            '{"name": "broken',
+            "[1, 2]",
+            venue("No City", city=""),
+            venue("Boise Hall", city="Boise", state="ID"),
+        )
+    )
+    rejects = tmp_path / "rejects.jsonl"
+    result = app.test_cli_runner().invoke(
+        import_command, ["venues", str(path), "--rejects", str(rejects)]
+    )
+    assert result.exit_code == 0, result.output
+    assert "Imported 2 of 5 venues (3 rejected)" in result.output
+    rejected = [json.loads(line) for line in rejects.read_text().splitlines()]
+    assert [row["line"] for row in rejected] == [2, 3, 4]
+    assert "invalid JSON" in rejected[0]["errors"]["record"][0]
+    assert rejected[1]["errors"] == {"record": ["not a JSON object"]}
+    assert "city" in rejected[2]["errors"]
+    with app.app_context():
+        assert Venue.query.filter_by(name="New Hall").count() == 1
+        boise = Area.query.filter_by(city="Boise", state="ID").one()
+        assert json.loads(boise.venues)[0]["name"] == "Boise Hall"
+
+
+def test_import_shows_rejects_unknown_ids_and_double_bookings(app):
+    with app.app_context():
+        busy = Show.query.filter_by(venue_id=1).order_by(Show.start_time).first()
+        assert busy.artist_id == 1
+        rows = [
+            (1, {"venue_id": 1, "artist_id": 2, "start_time": "2031-01-01 20:00:00"}),
+            (2, {"venue_id": 999, "artist_id": 2, "start_time": "2031-01-02 20:00:00"}),
+            (3, {"venue_id": 1, "artist_id": 3, "start_time": "2031-01-01 21:00:00"}),
+            (4, {"venue_id": 2, "artist_id": 5, "start_time": "2031-02-01 20:00:00"}),
+            # venue 6 is free then, artist 1 plays venue 1's first show
+            (
+                5,
+                {
+                    "venue_id": 6,
+                    "artist_id": 1,
+                    "start_time": busy.start_time.strftime("%Y-%m-%d %H:%M:%S"),
+                },
+            ),
+        ]
+        rejected = {}
+        importer = Importer("shows", rejected.__setitem__)
+        importer.run(rows)
+        assert importer.accepted == 2
+        assert rejected == {
+            2: {"venue_id": ["unknown venue"]},
+            3: {"start_time": ["venue already booked"]},
+            5: {"start_time": ["artist already booked"]},
+        }
+        assert Venue.query.get(1).upcoming_shows_count == 3
+
+
+def test_read_rows_turns_bad_json_lines_into_rejects(tmp_path):
+    path = tmp_path / "rows.jsonl"
+    path.write_text(jsonl({"a": 1}, "nope", "", '"text"'))
+    with path.open() as stream:
+        rows = list(read_rows(stream, "jsonl"))
+    assert [line for line, _ in rows] == [1, 2, 4]
+    assert rows[0][1] == {"a": 1}
+    assert all(isinstance(row, ValueError) for _, row in rows[1:])
+
+
+def test_reserve_ids_takes_the_write_lock_first(app):
+    with app.app_context():
+        writer = ExecutemanyWriter(db.session)
+        assert writer.reserve_ids(Venue, 2) == [7, 8]
+        assert db.session.connection().connection.connection.in_transaction
+        db.session.rollback()
@@ -0,0 +1,38 @@
+import pytest
+
+from conftest import statements
+from models import Show, db, venue_genre
+
+# (method, url) -> (statements, ORM instances hydrated per model); pages
+# select the columns they show and hydrate only the entity being displayed
+PROFILES = {
+    ("GET", "/venues"): (3, {}),
+    ("GET", "/venues/1"): (5, {"Venue": 1, "Genre": 2}),
+    ("GET", "/artists"): (3, {}),
+    ("GET", "/artists/1"): (5, {"Artist": 1, "Genre": 2}),
+    ("GET", "/shows"): (2, {}),
+    ("GET", "/venues/2/edit"): (1, {"Venue": 1, "Genre": 2}),
+    ("GET", "/artists/2/edit"): (1, {"Artist": 1, "Genre": 2}),
+    ("DELETE", "/venues/2"): (13, {"Venue": 1, "Show": 4, "Genre": 2}),
+}
+
+
+@pytest.mark.parametrize("method, url", PROFILES)
+def test_statements_and_rows_hydrated(client, hydrated, method, url):
+    client.get("/")  # load the genre catalog first
+    hydrated.clear()
+    response = client.open(url, method=method)
+    assert response.status_code == 200
+    expected_statements, expected_hydrated = PROFILES[method, url]
+    assert statements(response) == expected_statements
+    assert dict(hydrated) == expected_hydrated
+
+
+def test_delete_venue_removes_genre_links_and_shows(app, client):
+    response = client.delete("/venues/2")
+    assert response.status_code == 200
+    assert response.get_json() == {"success": True}
+    with app.app_context():
+        links = venue_genre.select().where(venue_genre.c.venue_id == 2)
+        assert db.session.execute(links).fetchall() == []
+        assert Show.query.filter_by(venue_id=2).count() == 0
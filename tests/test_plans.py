@@ -0,0 +1,114 @@
+"""
+EXPLAIN checks for the Show time-range queries: the upcoming/past windows of
+show_venue and show_artist and the counter refresh behind the venues page
+reach Show through its (key, start_time) index, never a sequential scan.
+
+Run on SQLite, and on PostgreSQL when TEST_POSTGRESQL_URL names a scratch
+database (its tables are dropped and recreated).
+"""
+import os
+import re
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from conftest import make_app
+from counters import counter_values
+from models import Show, Venue, db
+from queries import artist_shows, venue_shows
+
+POSTGRESQL_URL = os.environ.get("TEST_POSTGRESQL_URL")
+
+
+class Explain(Executable, ClauseElement):
+    def __init__(self, statement, prefix):
+        self.statement = statement
+        self.prefix = prefix
+
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kw):
+    return f"{element.prefix} {compiler.process(element.statement, **kw)}"
+
+
+# plan lines that mean Show was read without an index
+SEQUENTIAL = {
+    "postgresql": re.compile(r'Seq Scan on "Show"'),
+    "sqlite": re.compile(r"\bSCAN Show\b(?! USING)"),
+}
+INDEXED = {
+    "postgresql": re.compile(r'Index (Only )?Scan .*on "Show"|Bitmap Index Scan on'),
+    "sqlite": re.compile(r"\b(SEARCH|SCAN) Show USING (COVERING )?INDEX"),
+}
+
+# name -> (query(now, window), index it should use); detail pages read one
+# window at a time
+QUERIES = {
+    # the venues page reads the counters, refreshed by roll-forward-shows
+    "venues: counter refresh": (
+        lambda now, window: select(
+            [Venue.id, *counter_values(Venue, Show.venue_id, now).values()]
+        ).where(Venue.next_show_time <= now),
+        "ix_Show_venue_id_start_time",
+    ),
+    "show_venue: upcoming": (
+        lambda now, window: venue_shows(1, upcoming=True, now=now).limit(window),
+        "ix_Show_venue_id_start_time",
+    ),
+    "show_venue: past": (
+        lambda now, window: venue_shows(1, upcoming=False, now=now).limit(window),
+        "ix_Show_venue_id_start_time",
+    ),
+    "show_artist: upcoming": (
+        lambda now, window: artist_shows(1, upcoming=True, now=now).limit(window),
+        "ix_Show_artist_id_start_time",
+    ),
+    "show_artist: past": (
+        lambda now, window: artist_shows(1, upcoming=False, now=now).limit(window),
+        "ix_Show_artist_id_start_time",
+    ),
+}
+
+
+def plan(query, dialect):
+    prefix = "EXPLAIN" if dialect == "postgresql" else "EXPLAIN QUERY PLAN"
+    statement = getattr(query, "statement", query)
+    rows = db.session.execute(Explain(statement, prefix)).fetchall()
+    return "\n".join(str(row[-1]) for row in rows)
+
+
+@pytest.fixture(scope="module", params=["sqlite", "postgresql"])
+def plan_app(request):
+    if request.param == "sqlite":
+        yield make_app(6)
+        return
+    if not POSTGRESQL_URL:
+        pytest.skip("TEST_POSTGRESQL_URL is not set")
+    try:
+        app = make_app(6, SQLALCHEMY_DATABASE_URI=POSTGRESQL_URL)
+    except (ImportError, OperationalError) as error:
+        pytest.skip(f"PostgreSQL is unavailable: {error}")
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.mark.parametrize("name", list(QUERIES))
+def test_show_reads_use_an_index(plan_app, name):
+    window = plan_app.config["DETAIL_SHOWS_PAGE_SIZE"] + 1
+    with plan_app.app_context():
+        dialect = db.engine.dialect.name
+        if dialect == "postgresql":
+            # scanning a test-sized table is cheaper than any index, so only
+            # check that an index applies at all
+            db.session.execute(text("SET LOCAL enable_seqscan = off"))
+        query, index = QUERIES[name]
+        explained = plan(query(datetime.now(), window), dialect)
+        db.session.rollback()
+    assert INDEXED[dialect].search(explained), explained
+    assert not SEQUENTIAL[dialect].search(explained), explained
+    assert index in explained, explained
@@ -0,0 +1,51 @@
+import pytest
+
+from models import Venue, db
+from search import Fts5Search, SearchBackend, install_search_indexes
+
+
+def names(rows):
+    return [row.name for row in rows]
+
+
+def test_backends_implement_search_and_hits():
+    with pytest.raises(TypeError):
+        SearchBackend()
+
+
+def test_search_falls_back_until_the_index_is_installed(app):
+    with app.app_context():
+        backend = Fts5Search()
+        assert not backend.installed(Venue)
+        assert names(backend.search(Venue, "Venue 1")) == ["Venue 1"]
+        install_search_indexes()
+        assert backend.installed(Venue)
+        db.session.add(Venue(name="Fresh Hall", city="Austin", state="TX"))
+        db.session.commit()
+        assert names(backend.search(Venue, "fresh")) == ["Fresh Hall"]
+
+
+def test_install_repairs_triggers_of_recreated_tables(app):
+    with app.app_context():
+        install_search_indexes()
+        # what flask seed --reset does: the FTS tables outlive the triggers
+        db.drop_all()
+        db.create_all()
+        assert not Fts5Search().installed(Venue)
+        install_search_indexes()
+        db.session.add(Venue(name="Reborn Hall", city="Austin", state="TX"))
+        db.session.commit()
+        backend = Fts5Search()
+        assert backend.installed(Venue)
+        assert names(backend.search(Venue, "reborn")) == ["Reborn Hall"]
+
+
+def test_search_pages_are_limited_but_counted(app, client):
+    app.config["SEARCH_MAX_RESULTS"] = 2
+    with app.app_context():
+        install_search_indexes()
+    page = client.post("/venues/search", data={"search_term": "Venue"})
+    body = page.get_data(as_text=True)
+    assert page.status_code == 200
+    assert body.count('href="/venues/') == 2
+    assert '"Venue": 6</h3>' in body
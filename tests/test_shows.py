@@ -0,0 +1,67 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from models import Show
+from queries import show_filters, time_window
+
+# a Wednesday
+NOW = datetime(2030, 1, 2, 15, 30)
+
+
+def api_shows(client, **params):
+    response = client.get("/api/v1/shows", query_string={"limit": 100, **params})
+    assert response.status_code == 200
+    return response.get_json()["data"]
+
+
+def test_time_windows_end_at_the_next_boundary():
+    assert time_window("today", NOW) == (NOW, datetime(2030, 1, 3))
+    assert time_window("week", NOW) == (NOW, datetime(2030, 1, 7))
+    assert time_window("month", NOW) == (NOW, datetime(2030, 2, 1))
+    assert time_window("upcoming", NOW) == (NOW, None)
+    with pytest.raises(ValueError):
+        time_window("decade", NOW)
+
+
+def test_date_ranges_include_both_days(app):
+    args = MultiDict({"from": "2030-01-02", "to": "2030-01-04", "city": "Austin"})
+    with app.app_context():
+        assert show_filters(args) == {
+            "since": datetime(2030, 1, 2),
+            "until": datetime(2030, 1, 5),
+            "city": "Austin",
+        }
+
+
+def test_filters_narrow_the_shows(app, client):
+    assert len(api_shows(client)) == 24
+    assert len(api_shows(client, when="upcoming")) == 12
+    tomorrow = date.today() + timedelta(days=1)
+    assert len(api_shows(client, **{"from": tomorrow.isoformat()})) == 12
+    austin = api_shows(client, city="Austin", state="TX")
+    with app.app_context():
+        expected = {show.id for show in Show.query if show.venue.city == "Austin"}
+        folk = {
+            show.id
+            for show in Show.query
+            if "Folk" in {g.name for g in show.venue.genres + show.artist.genres}
+        }
+    assert {show["id"] for show in austin} == expected
+    assert {show["id"] for show in api_shows(client, genre="Folk")} == folk
+
+
+def test_the_next_page_keeps_the_filters(client):
+    response = client.get("/shows?city=Austin&limit=2")
+    assert response.status_code == 200
+    assert b"city=Austin" in response.data
+
+
+@pytest.mark.parametrize(
+    "params",
+    [{"from": "yesterday"}, {"to": "2030-13-01"}, {"genre": "Polka"}, {"when": "x"}],
+)
+@pytest.mark.parametrize("url", ["/shows", "/api/v1/shows"])
+def test_malformed_filters_are_bad_requests(client, url, params):
+    assert client.get(url, query_string=params).status_code == 400
@@ -0,0 +1,46 @@
+import pytest
+
+from conftest import make_app, statements
+from facets import facet_counts
+
+# statements per page on a cold process cache; listing pages must not
+# issue one query per venue, artist or show (N+1)
+ROUTES = {
+    "/venues": 3,
+    "/venues/1": 5,
+    "/artists": 3,
+    "/artists/1": 5,
+    "/shows": 2,
+}
+
+
+@pytest.fixture(autouse=True)
+def cold_facets():
+    facet_counts.invalidate()
+
+
+@pytest.mark.parametrize("url, expected", ROUTES.items())
+def test_statements_per_route(client, url, expected):
+    response = client.get(url)
+    assert response.status_code == 200
+    assert statements(response) == expected
+
+
+@pytest.mark.parametrize("url", ROUTES)
+def test_statements_do_not_grow_with_rows(url):
+    counts = []
+    for size in (3, 30):
+        facet_counts.invalidate()
+        response = make_app(size).test_client().get(url)
+        assert response.status_code == 200
+        counts.append(statements(response))
+    assert counts[0] == counts[1]
+
+
+@pytest.mark.parametrize("url", ["/venues/1", "/artists/1"])
+def test_fanout_counts_every_statement(url):
+    client = make_app(6, DETAIL_FANOUT_WORKERS=4).test_client()
+    for _ in range(5):
+        response = client.get(url)
+        assert response.status_code == 200
+        assert statements(response) == ROUTES[url]
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+from models import Artist, Show, Venue, db
+from queries import artist_version, venue_version
+
+
+def test_renaming_an_artist_moves_the_versions_of_its_venues(app, client):
+    # artist 1 plays at venue 1, not at venue 2 (see conftest.populate)
+    etag = client.get("/venues/1").headers["ETag"]
+    other = client.get("/venues/2").headers["ETag"]
+    with app.app_context():
+        Artist.query.get(1).name = "Renamed"
+        db.session.commit()
+    assert client.get("/venues/1").headers["ETag"] != etag
+    assert client.get("/venues/2").headers["ETag"] == other
+
+
+def test_versions_move_when_a_show_starts(app):
+    with app.app_context():
+        venue = Venue.query.get(1)
+        start = venue.next_show_time
+        before = venue_version(1, now=start - timedelta(minutes=1))
+        assert venue_version(1, now=start) != before
+        artist_id = Show.query.filter_by(venue_id=1, start_time=start).one().artist_id
+        before = artist_version(artist_id, now=start - timedelta(minutes=1))
+        assert artist_version(artist_id, now=start) != before
+
+
+def test_show_writes_move_the_version(app, client):
+    etag = client.get("/artists/1").headers["ETag"]
+    with app.app_context():
+        Show.query.filter_by(artist_id=1).first().start_time += timedelta(days=400)
+        db.session.commit()
+    assert client.get("/artists/1").headers["ETag"] != etag
+
+
+def test_last_modified_comes_from_utc_updated_at_only(app, client):
+    with app.app_context():
+        venue = Venue.query.get(1)
+        updated_at = venue.updated_at.replace(microsecond=0)
+        # the next show starts later than any updated_at, in local time
+        assert venue.next_show_time > venue.updated_at
+    response = client.get("/venues/1")
+    assert response.last_modified.replace(tzinfo=None) == updated_at
+    for url in ("/venues", "/artists", "/shows"):
+        modified = client.get(url).last_modified.replace(tzinfo=None)
+        assert modified <= datetime.utcnow()
@@ -0,0 +1,8 @@
+"""
+Production entry point.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+from app import create_app
+
+app = application = create_app()